@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Async API - awaitable search and design system generation for
+asyncio applications (e.g. one orchestrator serving many agent sessions).
+
+Usage:
+    from async_api import async_search, async_search_stack, async_generate_design_system
+
+    style, rules = await asyncio.gather(
+        async_search("glassmorphism dark", "style"),
+        async_search("focus", "web", where={"Severity": "Critical"}),
+    )
+    design = await async_generate_design_system("SaaS dashboard", output_format="json")
+
+Each coroutine runs its synchronous counterpart (core.search, ...) in a
+worker thread, so index loading, scoring and result cache lookups never
+block the event loop. Every call shares core's process-wide index cache:
+concurrent cold lookups of a CSV load it once, and a warm index is read
+without taking any lock (see PERSISTENT INDEX in core.py); only the
+persistent result cache serializes its brief lookups (cache=False skips
+it).
+
+Calls run on one shared pool of ASYNC_WORKERS threads unless given their
+own executor=. Scoring is CPU-bound Python: extra threads add no
+throughput, but each one contends for the GIL with the event loop.
+"""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from core import MAX_RESULTS, search, search_many, search_stack, warm_indexes
+
+
+# ============ CONFIGURATION ============
+ASYNC_WORKERS = int(os.environ.get("UIPRO_ASYNC_WORKERS", min(4, os.cpu_count() or 1)))
+_EXECUTOR = None
+_EXECUTOR_LOCK = threading.Lock()
+
+
+def _executor():
+    """The shared worker pool, started on first use"""
+    global _EXECUTOR
+    if _EXECUTOR is None:
+        with _EXECUTOR_LOCK:
+            if _EXECUTOR is None:
+                _EXECUTOR = ThreadPoolExecutor(ASYNC_WORKERS, thread_name_prefix="uipro-search")
+    return _EXECUTOR
+
+
+async def _run(executor, fn, *args):
+    """Await fn(*args) in executor (None: the shared pool)"""
+    return await asyncio.get_running_loop().run_in_executor(executor or _executor(), partial(fn, *args))
+
+
+# ============ SEARCH ============
+async def async_search(query, domain=None, max_results=MAX_RESULTS, fields=None, cache=True, where=None,
+                       executor=None):
+    """core.search() off the event loop"""
+    return await _run(executor, search, query, domain, max_results, fields, cache, where)
+
+
+async def async_search_stack(query, stack, max_results=MAX_RESULTS, fields=None, cache=True, where=None,
+                             executor=None):
+    """core.search_stack() off the event loop"""
+    return await _run(executor, search_stack, query, stack, max_results, fields, cache, where)
+
+
+async def async_search_many(queries, cache=True, executor=None):
+    """core.search_many() off the event loop: one batch, one thread"""
+    return await _run(executor, search_many, queries, cache)
+
+
+# ============ DESIGN SYSTEM ============
+async def async_generate_design_system(query, project_name=None, output_format="ascii", cache=True, executor=None):
+    """design_system.generate_design_system() off the event loop"""
+    from design_system import generate_design_system
+    return await _run(executor, generate_design_system, query, project_name, output_format, cache)
+
+
+async def async_warm_indexes(executor=None):
+    """Load every index off the event loop, e.g. at orchestrator startup"""
+    await _run(executor, warm_indexes)
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Benchmark - latency and memory of search, search_stack and
+generate_design_system over a fixed query corpus.
+
+Usage:
+    python benchmark.py                          # scale 1x, report to stdout
+    python benchmark.py --scales 1,10,100 -o bench.json
+    python benchmark.py --compare old.json -o new.json
+
+Each scale runs in its own worker process against a copy of the data whose
+CSVs are repeated N times (synthetic rows get distinct "variantK" tokens so
+the vocabulary grows too), with a private index dir. A worker reports:
+    build   time to compile the bundle from scratch
+    warm    per-call latency in the worker after one untimed call per query;
+            filtered / unfiltered run FILTERED_QUERIES with and without
+            their where filters
+    cold    wall time of fresh `search.py` processes (bundle already built)
+    imports `-X importtime` of a plain domain search, in at least
+            IMPORT_RUNS runs each paired with the bare interpreter's own
+            startup imports (baseline): medians of total, baseline and
+            their ratio, the heaviest modules, and any LAZY_MODULES that
+            loaded anyway
+    cached  search latency answered by the persistent result cache, in the
+            worker (hit) and in fresh `search.py` processes (cold_hit)
+    quality nDCG/MRR from evaluate.py (unscaled data only)
+All other cases run with the result cache disabled.
+Latencies are in milliseconds (p50/p95/p99/mean); peak RSS in KiB.
+The report is sorted JSON so two runs can be diffed directly. The exit
+status is 1 if the import check fails: a lazy module loaded, or the median
+ratio exceeds --import-budget (a loaded machine slows both sides of it).
+"""
+
+import argparse
+import csv
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).parent
+DEFAULT_DATA_DIR = SCRIPTS_DIR.parent / "data"
+
+
+# ============ QUERY CORPUS ============
+DOMAIN_QUERIES = {
+    "style": ["glassmorphism dark", "minimal clean", "brutalism bold", "soft ui neumorphism"],
+    "prompt": ["glassmorphism blur", "retro gradient", "dark mode neon"],
+    "color": ["saas dashboard", "beauty spa wellness", "fintech crypto"],
+    "chart": ["trend time series", "comparison categories", "real-time streaming"],
+    "landing": ["hero social proof", "pricing cta", "waitlist launch"],
+    "product": ["ecommerce", "healthcare app", "education platform"],
+    "ux": ["accessibility focus keyboard", "loading animation", "form validation"],
+    "typography": ["elegant luxury serif", "modern tech", "playful"],
+    "icons": ["navigation menu", "social share", "settings"],
+    "react": ["rerender memo", "bundle size", "waterfall fetch"],
+    "web": ["focus outline", "form labels", "touch target"],
+    "all": ["dark mode dashboard", "accessible form"],
+}
+STACK_QUERIES = ["state management", "responsive layout", "performance images", "form validation", "animation"]
+DESIGN_SYSTEM_QUERIES = ["SaaS dashboard", "beauty spa wellness", "fintech crypto", "e-commerce luxury"]
+FILTERED_QUERIES = [
+    ("accessibility focus keyboard", "ux", {"Severity": "High"}),
+    ("form validation", "ux", {"Platform": ["Web", "All"]}),
+    ("loading animation", "ux", {"Severity": "High", "Platform": "Mobile"}),
+    ("focus outline", "web", {"Severity": "Critical"}),
+    ("rerender memo", "react", {"Severity": ["Critical", "High"]}),
+]
+
+WARM_REPEAT = 20
+COLD_REPEAT = 5
+PERCENTILES = (50, 95, 99)
+
+# Startup budget for `search.py <query> --domain <d>`, as a multiple of the
+# bare interpreter's startup imports (about 4x here, so 2x headroom), and
+# modules only other modes (or large corpora) may load
+IMPORT_BUDGET = 8.0
+IMPORT_RUNS = 5
+LAZY_MODULES = ("numpy", "design_system", "server", "http.server", "http.client", "concurrent.futures", "csv")
+
+
+# ============ SYNTHETIC DATA ============
+def scale_data(src, dst, factor):
+    """Copy every CSV under src to dst with its rows repeated factor times.
+
+    Copy k > 0 of a row appends " variant<k>" to each cell of the first
+    column, so the index sees new documents and new terms, not duplicates.
+    """
+    for path in sorted(src.rglob("*.csv")):
+        target = dst / path.relative_to(src)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            rows = list(csv.reader(f))
+        with open(target, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(rows[0])
+            for k in range(factor):
+                for row in rows[1:]:
+                    writer.writerow([f"{row[0]} variant{k}"] + row[1:] if k and row else row)
+
+
+# ============ STATISTICS ============
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an ascending list"""
+    rank = max(1, -(-pct * len(sorted_values) // 100))
+    return sorted_values[rank - 1]
+
+
+def summarize(samples):
+    """Latency summary in milliseconds"""
+    ms = sorted(s * 1000 for s in samples)
+    summary = {f"p{pct}": round(percentile(ms, pct), 3) for pct in PERCENTILES}
+    summary["mean"] = round(sum(ms) / len(ms), 3)
+    summary["n"] = len(ms)
+    return summary
+
+
+def peak_rss_kib(who="self"):
+    """Peak resident set size in KiB, or None where resource is unavailable"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF if who == "self" else resource.RUSAGE_CHILDREN)
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    return usage.ru_maxrss // 1024 if sys.platform == "darwin" else usage.ru_maxrss
+
+
+# ============ WORKER ============
+def _time_calls(fn, calls, repeat):
+    """Call each fn(*args) once untimed, then time repeat rounds of all of them"""
+    for args in calls:
+        fn(*args)
+    samples = []
+    for _ in range(repeat):
+        for args in calls:
+            start = time.perf_counter()
+            fn(*args)
+            samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def _time_cold(argv_list, repeat, env=None):
+    samples = []
+    for _ in range(repeat):
+        for argv in argv_list:
+            start = time.perf_counter()
+            subprocess.run([sys.executable, str(SCRIPTS_DIR / "search.py")] + argv + ["--no-daemon"],
+                           check=True, stdout=subprocess.DEVNULL, env=env)
+            samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def _import_times(argv):
+    """{module: (self_us, cumulative_us, depth)} from one `python -X importtime <argv>` run"""
+    proc = subprocess.run([sys.executable, "-X", "importtime"] + argv,
+                          check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        times[name.strip()] = (int(self_us), int(cumulative_us), depth)
+    return times
+
+
+def _top_level_ms(times):
+    return sum(c for _, c, depth in times.values() if depth == 0) / 1000
+
+
+def check_imports(argv, repeat, budget=IMPORT_BUDGET):
+    """Import-time report for one search.py invocation; "ok" if no lazy
+    module loaded and the median total is at most budget times the baseline.
+
+    Modules the bare interpreter already imports at startup are not counted
+    in the total; their time is the baseline, measured before every run so
+    both see the same machine load. The scripts are byte-compiled first, so
+    a stale or unwritable __pycache__ does not count as import time.
+    """
+    import compileall
+    compileall.compile_dir(str(SCRIPTS_DIR), maxlevels=0, quiet=2)
+    argv = [str(SCRIPTS_DIR / "search.py")] + argv + ["--no-daemon"]
+    baselines, runs = [], []
+    for _ in range(max(IMPORT_RUNS, repeat)):
+        startup = _import_times(["-c", "pass"])
+        baselines.append(_top_level_ms(startup))
+        runs.append({name: t for name, t in _import_times(argv).items() if name not in startup})
+    totals = [_top_level_ms(run) for run in runs]
+    ratio = percentile(sorted(total / baseline for total, baseline in zip(totals, baselines)), 50)
+    best = runs[totals.index(min(totals))]
+    top_level = sorted(((c, name) for name, (_, c, depth) in best.items() if depth == 0), reverse=True)
+    loaded = sorted(name for name in LAZY_MODULES if any(name in run for run in runs))
+    return {
+        "total_ms": round(percentile(sorted(totals), 50), 3),
+        "baseline_ms": round(percentile(sorted(baselines), 50), 3),
+        "ratio": round(ratio, 2),
+        "budget": budget,
+        "heaviest": {name: round(c / 1000, 3) for c, name in top_level[:5]},
+        "lazy_loaded": loaded,
+        "ok": ratio <= budget and not loaded,
+    }
+
+def run_worker(warm_repeat, cold_repeat, quality, import_budget=IMPORT_BUDGET):
+    """Benchmark the data/index dirs given by UIPRO_DATA_DIR / UIPRO_INDEX_DIR"""
+    import core
+    from design_system import _generate_cached, generate_design_system
+
+    report = {"backend": core.BM25_BACKEND, "numpy": core._load_numpy() is not None}
+    report["rows"] = sum(len(core._load_csv(core.DATA_DIR / c["file"])) for c in core.CSV_CONFIG.values())
+
+    start = time.perf_counter()
+    core.build_bundle(force=True)
+    report["build_ms"] = round((time.perf_counter() - start) * 1000, 3)
+
+    domain_calls = [(q, d) for d, queries in DOMAIN_QUERIES.items() for q in queries]
+    stack_calls = [(q, s) for s in core.AVAILABLE_STACKS for q in STACK_QUERIES]
+
+    def design_system(query):
+        _generate_cached.cache_clear()  # time generation, not the result cache
+        generate_design_system(query, None, "ascii")
+
+    def filtered(query, domain, where):
+        core.search(query, domain, where=where)
+
+    report["warm"] = {
+        "search": _time_calls(core.search, domain_calls, warm_repeat),
+        "search_stack": _time_calls(core.search_stack, stack_calls, warm_repeat),
+        "design_system": _time_calls(design_system, [(q,) for q in DESIGN_SYSTEM_QUERIES], max(1, warm_repeat // 4)),
+        "filtered": _time_calls(filtered, FILTERED_QUERIES, warm_repeat),
+        "unfiltered": _time_calls(core.search, [(q, d) for q, d, _ in FILTERED_QUERIES], warm_repeat),
+    }
+    report["peak_rss_kib"] = peak_rss_kib()
+
+    core.RESULT_CACHE = True
+    report["cached"] = {"hit": _time_calls(core.search, domain_calls, warm_repeat)}
+    core.RESULT_CACHE = False
+
+    if cold_repeat:
+        report["cold"] = {
+            "search": _time_cold([[DOMAIN_QUERIES["style"][0], "--domain", "style"]], cold_repeat),
+            "search_stack": _time_cold([[STACK_QUERIES[0], "--stack", core.AVAILABLE_STACKS[0]]], cold_repeat),
+            "design_system": _time_cold([[DESIGN_SYSTEM_QUERIES[0], "--design-system"]], cold_repeat),
+        }
+        report["cold_peak_rss_kib"] = peak_rss_kib("children")
+        # Answered from the entries the hit case above stored
+        report["cached"]["cold_hit"] = _time_cold([[DOMAIN_QUERIES["style"][0], "--domain", "style"]], cold_repeat,
+                                                  dict(os.environ, UIPRO_RESULT_CACHE="1"))
+        report["imports"] = check_imports([DOMAIN_QUERIES["style"][0], "--domain", "style"], cold_repeat,
+                                          import_budget)
+
+    if quality:
+        from evaluate import evaluate
+        report["quality"] = evaluate()["overall"]
+    return report
+
+
+# ============ DRIVER ============
+def run_scale(factor, data_dir, warm_repeat, cold_repeat, import_budget=IMPORT_BUDGET):
+    """Run one worker process on data scaled by factor"""
+    with tempfile.TemporaryDirectory(prefix="uipro-bench-") as tmp:
+        tmp = Path(tmp)
+        if factor == 1:
+            shutil.copytree(data_dir, tmp / "data")
+        else:
+            scale_data(data_dir, tmp / "data", factor)
+        env = dict(os.environ, UIPRO_DATA_DIR=str(tmp / "data"), UIPRO_INDEX_DIR=str(tmp / "index"),
+                   UIPRO_RESULT_CACHE="0")
+        argv = ["--worker", "--warm-repeat", str(warm_repeat), "--cold-repeat", str(cold_repeat),
+                "--import-budget", str(import_budget)]
+        if factor == 1:
+            argv.append("--quality")  # judgments only hold for the real data
+        out = subprocess.run([sys.executable, __file__] + argv,
+                             env=env, cwd=SCRIPTS_DIR, check=True, capture_output=True, text=True).stdout
+    return json.loads(out)
+
+
+def compare(old, new):
+    """Lines of p50 changes between two reports"""
+    lines = []
+    for scale, result in new["scales"].items():
+        before = old.get("scales", {}).get(scale)
+        if not before:
+            continue
+        if "quality" in result and "quality" in before:
+            q, prev = result["quality"], before["quality"]
+            lines.append(f"{scale}x quality nDCG {prev['ndcg']:.4f} -> {q['ndcg']:.4f}, MRR {prev['mrr']:.4f} -> {q['mrr']:.4f}")
+        for mode in ("warm", "cold", "cached"):
+            for case, stats in result.get(mode, {}).items():
+                prev = before.get(mode, {}).get(case)
+                if prev:
+                    change = (stats["p50"] - prev["p50"]) / prev["p50"] * 100 if prev["p50"] else 0.0
+                    lines.append(f"{scale}x {mode:4} {case:14} p50 {prev['p50']:9.3f} -> {stats['p50']:9.3f} ms ({change:+.1f}%)")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark UI Pro Max search latency")
+    parser.add_argument("--scales", default="1", help="Comma-separated data scale factors (default: 1)")
+    parser.add_argument("--warm-repeat", type=int, default=WARM_REPEAT, help=f"Timed rounds per warm case (default: {WARM_REPEAT})")
+    parser.add_argument("--cold-repeat", type=int, default=COLD_REPEAT, help=f"Process starts per cold case, 0 to skip (default: {COLD_REPEAT})")
+    parser.add_argument("--import-budget", type=float, default=IMPORT_BUDGET,
+                        help=f"Allowed search.py import time, in multiples of the bare interpreter's (default: {IMPORT_BUDGET})")
+    parser.add_argument("--data-dir", type=Path, default=DEFAULT_DATA_DIR, help="Source data to scale")
+    parser.add_argument("--output", "-o", type=Path, help="Write the JSON report here instead of stdout")
+    parser.add_argument("--compare", type=Path, help="Previous report to print p50 changes against")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--quality", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.warm_repeat, args.cold_repeat, args.quality, args.import_budget)))
+        return
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "scales": {},
+    }
+    for factor in (int(s) for s in args.scales.split(",")):
+        print(f"Benchmarking {factor}x ...", file=sys.stderr)
+        report["scales"][str(factor)] = run_scale(factor, args.data_dir, args.warm_repeat, args.cold_repeat,
+                                                  args.import_budget)
+
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        args.output.write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+    if args.compare:
+        for line in compare(json.loads(args.compare.read_text(encoding="utf-8")), report):
+            print(line, file=sys.stderr)
+
+    failed = [scale for scale, result in report["scales"].items() if not result.get("imports", {}).get("ok", True)]
+    for scale in failed:
+        imports = report["scales"][scale]["imports"]
+        print(f"{scale}x import check failed: {imports['total_ms']} ms, {imports['ratio']}x the "
+              f"{imports['baseline_ms']} ms baseline (budget {imports['budget']}x), "
+              f"lazy modules loaded: {', '.join(imports['lazy_loaded']) or 'none'}", file=sys.stderr)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Search Client - asks a running search daemon (see server.py).
+
+Kept apart from server.py so the CLI does not import the HTTP server stack:
+when nothing listens on the port, query_daemon() returns after one failed
+TCP connect, before http.client or json are even imported.
+"""
+
+import os
+import socket
+
+
+# ============ CONFIGURATION ============
+DEFAULT_HOST = os.environ.get("UIPRO_SEARCH_HOST", "127.0.0.1")
+DEFAULT_PORT = int(os.environ.get("UIPRO_SEARCH_PORT", "8765"))
+CLIENT_TIMEOUT = 5.0
+
+
+# ============ CLIENT ============
+def query_daemon(op, args, host=DEFAULT_HOST, port=DEFAULT_PORT, timeout=CLIENT_TIMEOUT, engine=None):
+    """Run op on the daemon; return its result, or None if no daemon answers.
+
+    With engine (core.engine_signature()), a daemon reporting another engine,
+    e.g. one started from the other skill copy, with another UIPRO_DATA_DIR
+    or an older index format, does not count as answering either.
+    """
+    try:
+        sock = socket.create_connection((host, port), timeout=timeout)
+    except OSError:
+        return None
+
+    import http.client
+    import json
+
+    conn = http.client.HTTPConnection(host, port, timeout=timeout)
+    conn.sock = sock
+    try:
+        body = json.dumps({"op": op, "args": args}, ensure_ascii=False).encode("utf-8")
+        conn.request("POST", "/", body, {"Content-Type": "application/json"})
+        response = conn.getresponse()
+        payload = json.loads(response.read())
+    except (OSError, http.client.HTTPException, ValueError):
+        return None
+    finally:
+        conn.close()
+
+    if response.status != 200:
+        return None
+    if engine is not None and payload.get("engine") != engine:
+        return None
+    return payload.get("result")
@@ -4,20 +4,76 @@
 UI/UX Pro Max Core - BM25 search engine for UI/UX style guides
 """
 
-import csv
+import heapq
+import os
 import re
+import sys
+import threading
 from pathlib import Path
 from math import log
+from bisect import bisect_left
 from collections import defaultdict
+from functools import lru_cache
+
+# csv and hashlib are imported where used: a search served from a current
+# bundle needs neither
+
+# Optional NumPy, imported by _load_numpy() only once a corpus is large enough
+# to use it (the import costs more than scoring a small CSV)
+np = None
+_NUMPY_TRIED = False
 
 # ============ CONFIGURATION ============
-DATA_DIR = Path(__file__).parent.parent / "data"
+DATA_DIR = Path(os.environ.get("UIPRO_DATA_DIR", Path(__file__).parent.parent / "data"))
+# One index store for every copy of the skill under the same agent dir
+# (.agent/skills, .agent/.shared, .claude/skills); a skill installed anywhere
+# else keeps its own .index. Either gets a .gitignore (see _make_index_dir)
+_SKILL_DIR = Path(__file__).resolve().parent.parent
+_AGENT_DIR = _SKILL_DIR.parent.parent
+if _SKILL_DIR.parent.name in ("skills", ".shared") and _AGENT_DIR.name in (".agent", ".claude"):
+    _DEFAULT_INDEX_DIR = _AGENT_DIR / ".index" / "ui-ux-pro-max"
+else:
+    _DEFAULT_INDEX_DIR = _SKILL_DIR / ".index"
+INDEX_DIR = Path(os.environ.get("UIPRO_INDEX_DIR", _DEFAULT_INDEX_DIR))
+INDEX_VERSION = 9
 MAX_RESULTS = 3
 
+# Scoring backend: "auto" uses NumPy for corpora of NUMPY_MIN_DOCS or more
+# when it is installed, "python" / "numpy" force one. Both rank identically.
+BM25_BACKEND = os.environ.get("UIPRO_BM25_BACKEND", "auto")
+NUMPY_MIN_DOCS = 2000
+# A filter allowing at most 1/SPARSE_FILTER_RATIO as many rows as a term's
+# posting list holds is scored by looking its rows up in the list rather than
+# walking the list
+SPARSE_FILTER_RATIO = 8
+
+# Fuzzy matching: query tokens no domain or stack knows (typos, partial
+# words) expand to at most FUZZY_MAX_EXPANSIONS close terms of the searched
+# index, each weighted by its similarity (see FuzzyVocabulary). A word some
+# index knows is spelled correctly and never expands
+FUZZY_MATCHING = os.environ.get("UIPRO_FUZZY", "1") != "0"
+FUZZY_MIN_LEN = 4
+FUZZY_MAX_EXPANSIONS = 3
+FUZZY_MIN_SIMILARITY = 0.55  # prefix completions
+FUZZY_TYPO_MIN_LEN = 5
+FUZZY_TYPO_MIN_SIMILARITY = 0.4
+FUZZY_MAX_EDITS = 1
+
+# Persistent result cache (see RESULT CACHE below): UIPRO_RESULT_CACHE=0
+# disables it; entries live RESULT_CACHE_TTL seconds, at most
+# RESULT_CACHE_MAX_ENTRIES of them
+RESULT_CACHE = os.environ.get("UIPRO_RESULT_CACHE", "1") != "0"
+RESULT_CACHE_TTL = float(os.environ.get("UIPRO_RESULT_CACHE_TTL", 7 * 24 * 3600))
+RESULT_CACHE_MAX_ENTRIES = int(os.environ.get("UIPRO_RESULT_CACHE_MAX_ENTRIES", 10000))
+
+# Optional "search_weights" ({column: weight}, unlisted columns weigh 1)
+# score a domain with BM25F, so a hit in a short name column outranks one
+# buried in long free text; domains without it use plain BM25.
 CSV_CONFIG = {
     "style": {
         "file": "styles.csv",
         "search_cols": ["Style Category", "Keywords", "Best For", "Type"],
+        "search_weights": {"Style Category": 3, "Keywords": 2},
         "output_cols": ["Style Category", "Type", "Keywords", "Primary Colors", "Effects & Animation", "Best For", "Performance", "Accessibility", "Framework Compatibility", "Complexity"]
     },
     "prompt": {
@@ -68,6 +124,7 @@ CSV_CONFIG = {
     "web": {
         "file": "web-interface.csv",
         "search_cols": ["Category", "Issue", "Keywords", "Description"],
+        "search_weights": {"Category": 3, "Issue": 2, "Keywords": 2},
         "output_cols": ["Category", "Issue", "Platform", "Description", "Do", "Don't", "Code Example Good", "Code Example Bad", "Severity"]
     }
 }
@@ -96,99 +153,1210 @@ _STACK_COLS = {
 AVAILABLE_STACKS = list(STACK_CONFIG.keys())
 
 
+def _load_numpy():
+    """The numpy module, or None if it is not installed (pure-Python scoring is used instead)"""
+    global np, _NUMPY_TRIED
+    if not _NUMPY_TRIED:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        np, _NUMPY_TRIED = numpy, True
+    return np
+
+
+# ============ TOKENIZER ============
+MIN_TOKEN_LEN = 3
+# Domain terms kept despite being shorter than MIN_TOKEN_LEN
+SHORT_TERMS = ("ui", "ux", "2d", "3d", "ai", "ar", "vr", "js")
+# Plural-only stemming (opt-in): "charts" ~ "chart", "categories" ~ "category"
+STEMMING = os.environ.get("UIPRO_STEM", "0") == "1"
+# Whole \w runs that are long enough or whitelisted; filtering happens in the regex engine
+_TOKEN_RE = re.compile(r"\b(?:\w{%d,}|%s)\b" % (MIN_TOKEN_LEN, "|".join(map(re.escape, SHORT_TERMS))))
+# Recorded with compiled indexes; any change here invalidates them
+TOKENIZER_SIGNATURE = f"{_TOKEN_RE.pattern};stem={int(STEMMING)}"
+
+
+@lru_cache(maxsize=None)
+def _stem(word):
+    """Harman S-stemmer: strip plural endings only"""
+    if len(word) <= 3 or not word.endswith("s") or word.endswith(("ss", "us")):
+        return word
+    if word.endswith("ies") and not word.endswith(("eies", "aies")):
+        return word[:-3] + "y"
+    if word.endswith("es") and not word.endswith(("aes", "ees", "oes")):
+        return word[:-1]
+    return word[:-1]
+
+
+def tokenize(text):
+    """Lowercase word tokens, dropping short words except SHORT_TERMS"""
+    tokens = _TOKEN_RE.findall(str(text).lower())
+    if STEMMING:
+        return [_stem(w) for w in tokens]
+    return tokens
+
+
+@lru_cache(maxsize=4096)
+def tokenize_query(query):
+    """Memoized tokenize() for queries, which repeat across searches"""
+    return tuple(tokenize(query))
+
+
+# ============ FUZZY VOCABULARY ============
+def _trigrams(word):
+    """Character trigrams of a word padded at both ends"""
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _within_edits(a, b, limit):
+    """Whether at most limit insertions, deletions, substitutions or adjacent
+    transpositions turn a into b (optimal string alignment distance)"""
+    if abs(len(a) - len(b)) > limit:
+        return False
+    before, previous = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (a[i - 1] != b[j - 1]))
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], before[j - 2] + 1)
+        if min(current) > limit:
+            return False
+        before, previous = previous, current
+    return previous[-1] <= limit
+
+
+class FuzzyVocabulary:
+    """Trigram and prefix index over a vocabulary, for expanding unknown tokens.
+
+    A term is close to a token if the token is a prefix of it ("glassmorph"
+    -> "glassmorphism", similarity len(token) / len(term)) or if the token
+    is a typo of it: at least FUZZY_TYPO_MIN_LEN long, within
+    FUZZY_MAX_EDITS edits ("accesibility"), similarity the Jaccard overlap
+    of their trigrams. Trigram overlap alone also matches different words
+    ("conversion" -> "conversation"), and short words one edit apart are
+    often both real ("might", "right").
+    """
+
+    def __init__(self, terms):
+        self.terms = sorted(terms)
+        grams = defaultdict(list)
+        for t, term in enumerate(self.terms):
+            for gram in _trigrams(term):
+                grams[gram].append(t)
+        self._grams = dict(grams)
+        self._gram_counts = [len(_trigrams(term)) for term in self.terms]
+        self.expand = lru_cache(maxsize=1024)(self._expand)
+
+    def _expand(self, token):
+        """Up to FUZZY_MAX_EXPANSIONS (term, similarity) pairs, closest first"""
+        similarity = {}
+
+        # Prefix matches form one contiguous run of the sorted vocabulary
+        lo = bisect_left(self.terms, token)
+        hi = bisect_left(self.terms, token + "\uffff", lo)
+        for t in range(lo, hi):
+            if len(token) / len(self.terms[t]) >= FUZZY_MIN_SIMILARITY:
+                similarity[t] = len(token) / len(self.terms[t])
+
+        # Typos: shared trigram counts, touching only terms with a common trigram
+        token_grams = _trigrams(token) if len(token) >= FUZZY_TYPO_MIN_LEN else ()
+        shared = defaultdict(int)
+        for gram in token_grams:
+            for t in self._grams.get(gram, ()):
+                shared[t] += 1
+        for t, common in shared.items():
+            jaccard = common / (len(token_grams) + self._gram_counts[t] - common)
+            if (jaccard >= FUZZY_TYPO_MIN_SIMILARITY and jaccard > similarity.get(t, 0.0)
+                    and _within_edits(token, self.terms[t], FUZZY_MAX_EDITS)):
+                similarity[t] = jaccard
+
+        best = heapq.nsmallest(FUZZY_MAX_EXPANSIONS, similarity.items(), key=lambda x: (-x[1], x[0]))
+        return tuple((self.terms[t], sim) for t, sim in best)
+
+
 # ============ BM25 IMPLEMENTATION ============
+def _doc_hash(document):
+    """Short content hash identifying a document (string or fields) across CSV edits"""
+    import hashlib
+    text = document if isinstance(document, str) else "\x1f".join(document)
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest()
+
+
+def _count_terms(tokens):
+    """Term frequencies of a token list, in first-occurrence order"""
+    term_freqs = defaultdict(int)
+    for word in tokens:
+        term_freqs[word] += 1
+    return dict(term_freqs)
+
+
 class BM25:
-    """BM25 ranking algorithm for text search"""
+    """BM25 ranking algorithm for text search.
+
+    Documents given as tuples of fields (one per search column) also keep
+    per-field term frequencies and lengths, so they can be scored as BM25F
+    with per-field weights (score(..., field_weights=...)).
+    """
 
     def __init__(self, k1=1.5, b=0.75):
         self.k1 = k1
         self.b = b
-        self.corpus = []
+        self.term_freqs = []
+        self.postings = {}
         self.doc_lengths = []
         self.avgdl = 0
         self.idf = {}
         self.doc_freqs = defaultdict(int)
         self.N = 0
+        self._matrix = {}
+        self._vocabulary = None
+        self.doc_hashes = []
+        # BM25F: number of fields (0 for plain string documents), per document
+        # {term: per-field tfs} and per-field lengths, and the field averages
+        self.fields = 0
+        self.field_freqs = []
+        self.field_lengths = []
+        self.avg_field_lengths = ()
+        self._field_scale_cache = {}
 
     def tokenize(self, text):
-        """Lowercase, split, remove punctuation, filter short words"""
-        text = re.sub(r'[^\w\s]', ' ', str(text).lower())
-        return [w for w in text.split() if len(w) > 2]
+        """Tokenize text (see module-level tokenize)"""
+        return tokenize(text)
+
+    def _analyze(self, document):
+        """(term frequencies, per-field tfs or None, field lengths or None) of one document"""
+        if isinstance(document, str):
+            return _count_terms(self.tokenize(document)), None, None
+        field_tokens = [self.tokenize(field) for field in document]
+        term_freqs = _count_terms([word for tokens in field_tokens for word in tokens])
+        field_counts = [_count_terms(tokens) for tokens in field_tokens]
+        field_freqs = {word: tuple(counts.get(word, 0) for counts in field_counts) for word in term_freqs}
+        return term_freqs, field_freqs, tuple(len(tokens) for tokens in field_tokens)
 
     def fit(self, documents):
-        """Build BM25 index from documents"""
-        self.corpus = [self.tokenize(doc) for doc in documents]
-        self.N = len(self.corpus)
+        """Build BM25 index (per-document term frequencies + inverted index)"""
+        self.doc_hashes = [_doc_hash(doc) for doc in documents]
+        self.N = len(documents)
         if self.N == 0:
             return
-        self.doc_lengths = [len(doc) for doc in self.corpus]
-        self.avgdl = sum(self.doc_lengths) / self.N
+        self.fields = 0 if isinstance(documents[0], str) else len(documents[0])
 
-        for doc in self.corpus:
-            seen = set()
-            for word in doc:
-                if word not in seen:
-                    self.doc_freqs[word] += 1
-                    seen.add(word)
+        postings = defaultdict(list)
+        for idx, doc in enumerate(documents):
+            term_freqs, field_freqs, field_lengths = self._analyze(doc)
+            self.term_freqs.append(term_freqs)
+            self.doc_lengths.append(sum(term_freqs.values()))
+            if self.fields:
+                self.field_freqs.append(field_freqs)
+                self.field_lengths.append(field_lengths)
+            for word in term_freqs:
+                postings[word].append(idx)
+                self.doc_freqs[word] += 1
+        self.postings = dict(postings)
+        self._fit_stats()
 
+    def _fit_stats(self):
+        """Average lengths and idf from the per-document data"""
+        self.avgdl = sum(self.doc_lengths) / self.N
+        if self.fields:
+            self.avg_field_lengths = tuple(sum(lengths) / self.N for lengths in zip(*self.field_lengths))
         for word, freq in self.doc_freqs.items():
             self.idf[word] = log((self.N - freq + 0.5) / (freq + 0.5) + 1)
 
-    def score(self, query):
-        """Score all documents against query"""
-        query_tokens = self.tokenize(query)
-        scores = []
+    def updated(self, documents):
+        """A new index for an edited version of the corpus, equal to a fresh fit.
+
+        Documents are compared by hash. The unchanged leading documents keep
+        their postings; the rest are re-added, reusing the term frequencies
+        of any old document with the same hash, so only new or modified
+        documents are tokenized and appending touches only the postings of
+        the appended terms. This index is left untouched for concurrent readers.
+        """
+        new = BM25(self.k1, self.b)
+        new.doc_hashes = hashes = [_doc_hash(doc) for doc in documents]
+        new.N = len(documents)
+        new.fields = self.fields if not documents else (0 if isinstance(documents[0], str) else len(documents[0]))
+
+        keep = 0
+        if new.fields == self.fields:
+            while keep < min(len(hashes), len(self.doc_hashes)) and hashes[keep] == self.doc_hashes[keep]:
+                keep += 1
+            field_data = zip(self.field_freqs, self.field_lengths) if self.fields else [(None, None)] * self.N
+            analyzed = [(term_freqs, *fields) for term_freqs, fields in zip(self.term_freqs, field_data)]
+            reusable = dict(zip(self.doc_hashes[keep:], analyzed[keep:]))
+        else:
+            reusable = {}
+
+        new.term_freqs = self.term_freqs[:keep]
+        new.doc_lengths = list(self.doc_lengths[:keep])
+        new.field_freqs = self.field_freqs[:keep]
+        new.field_lengths = list(self.field_lengths[:keep])
+        new.doc_freqs = defaultdict(int, self.doc_freqs)
+        postings = dict(self.postings)
+        copied = set()
+
+        def own(term):
+            """The posting list of term, copied before its first change"""
+            if term not in copied:
+                copied.add(term)
+                postings[term] = list(postings.get(term, ()))
+            return postings[term]
+
+        # Old documents past the unchanged prefix hold the highest ids of every list
+        for term_freqs in self.term_freqs[keep:]:
+            for word in term_freqs:
+                own(word).pop()
+                new.doc_freqs[word] -= 1
+
+        for idx in range(keep, new.N):
+            term_freqs, field_freqs, field_lengths = reusable.get(hashes[idx]) or self._analyze(documents[idx])
+            new.term_freqs.append(term_freqs)
+            new.doc_lengths.append(sum(term_freqs.values()))
+            if new.fields:
+                new.field_freqs.append(field_freqs)
+                new.field_lengths.append(field_lengths)
+            for word in term_freqs:
+                own(word).append(idx)
+                new.doc_freqs[word] += 1
+
+        for word in copied:
+            if not postings[word]:
+                del postings[word]
+                del new.doc_freqs[word]
+        new.postings = postings
+        if new.N:
+            new._fit_stats()
+        return new
+
+    def score(self, query, top_k=None, field_weights=None, allowed=None):
+        """Score documents containing any query token, best first.
+
+        Only documents reached through the inverted index are scored; all
+        others would score 0. Ties keep document order, as a full stable
+        sort would. With top_k, only the best k are returned.
+
+        field_weights (one per field) switches to BM25F: each field's tf is
+        length-normalized per field, weighted and summed into one pseudo
+        frequency before saturation. Plain string documents ignore it.
+
+        allowed (an int bitmap of document ids, see FACETS) restricts
+        scoring to those documents; postings of all others are skipped.
+        """
+        return self.score_tokens(tokenize_query(query), top_k, field_weights, allowed)
+
+    def score_tokens(self, query_tokens, top_k=None, field_weights=None, allowed=None):
+        """score() for an already tokenized query"""
+        if allowed is not None:
+            if not allowed:
+                return []
+            if allowed == (1 << self.N) - 1:
+                allowed = None
+        terms = self.expand_tokens(query_tokens)
+        field_weights = tuple(field_weights) if field_weights and self.fields else None
+        if self._use_numpy():
+            return self._score_numpy(terms, top_k, field_weights, allowed)
+        return self._score_python(terms, top_k, field_weights, allowed)
+
+    def expand_tokens(self, query_tokens):
+        """(term, weight) pairs to score: known tokens at weight 1, unknown
+        ones replaced by their fuzzy expansions (see FuzzyVocabulary) unless
+        another index knows them (see known_term)"""
+        terms = []
+        for token in query_tokens:
+            if self._term_idf(token) is not None:
+                terms.append((token, 1.0))
+            elif FUZZY_MATCHING and len(token) >= FUZZY_MIN_LEN and self.N and not known_term(token):
+                terms.extend(self.vocabulary().expand(token))
+        return terms
+
+    def vocabulary(self):
+        """FuzzyVocabulary over this index's terms, built on first use"""
+        if self._vocabulary is None:
+            self._vocabulary = FuzzyVocabulary(self._terms())
+        return self._vocabulary
+
+    def score_bound(self, query_tokens):
+        """(upper bound of any document's score, share of tokens matched)
+
+        Each term's contribution saturates below idf * (k1 + 1) as tf grows,
+        so dividing by the bound puts scores from different corpora on a
+        common 0..1 scale. Fuzzy expansions count at their weight.
+        """
+        bound, matched = 0.0, 0
+        for token in query_tokens:
+            terms = self.expand_tokens((token,))
+            for term, weight in terms:
+                bound += weight * self._term_idf(term) * (self.k1 + 1)
+            matched += bool(terms)
+        return bound, (matched / len(query_tokens) if query_tokens else 0.0)
+
+    def _use_numpy(self):
+        if BM25_BACKEND == "python" or (BM25_BACKEND != "numpy" and self.N < NUMPY_MIN_DOCS):
+            return False
+        return _load_numpy() is not None
+
+    def _term_idf(self, token):
+        return self.idf.get(token)
+
+    def _terms(self):
+        return self.idf.keys()
+
+    def _postings(self, token):
+        """(idf, doc ids, term frequencies) for a token, or None if unseen"""
+        idf = self.idf.get(token)
+        if idf is None:
+            return None
+        docs = self.postings[token]
+        return idf, docs, [self.term_freqs[idx][token] for idx in docs]
+
+    def _field_postings(self, token):
+        """(idf, doc ids, per-field term frequency tuples) for a token, or None if unseen"""
+        idf = self.idf.get(token)
+        if idf is None:
+            return None
+        docs = self.postings[token]
+        return idf, docs, [self.field_freqs[idx][token] for idx in docs]
+
+    def _field_length_rows(self):
+        return self.field_lengths
+
+    def _field_scales(self, field_weights):
+        """Per document, each field's weight over its length normalization"""
+        scales = self._field_scale_cache.get(field_weights)
+        if scales is None:
+            norms = list(zip(field_weights, self.avg_field_lengths))
+            scales = [tuple(weight / (1 - self.b + self.b * (length / avg if avg else 0.0))
+                            for (weight, avg), length in zip(norms, lengths))
+                      for lengths in self._field_length_rows()]
+            self._field_scale_cache[field_weights] = scales
+        return scales
+
+    def _score_python(self, terms, top_k, field_weights=None, allowed=None):
+        scores = {}
+        scales = self._field_scales(field_weights) if field_weights else None
+        ids = rows = None
+        if allowed is not None:
+            ids, rows = _bitmap_rows(allowed)
+
+        for token, weight in terms:
+            posting = self._field_postings(token) if scales is not None else self._postings(token)
+            if posting is None:
+                continue
+            idf, docs, tfs = posting
+            keep = rows
+            if ids is not None and len(ids) * SPARSE_FILTER_RATIO <= len(docs):
+                pairs, keep = _intersect(ids, docs, tfs), None
+            else:
+                pairs = zip(docs, tfs)
+
+            if scales is not None:
+                # BM25F: saturate the weighted, per-field normalized frequency
+                for idx, field_tfs in pairs:
+                    if keep is not None and idx not in keep:
+                        continue
+                    tf = sum(tf * scale for tf, scale in zip(field_tfs, scales[idx]))
+                    term_score = idf * tf * (self.k1 + 1) / (self.k1 + tf)
+                    if weight != 1.0:
+                        term_score *= weight
+                    scores[idx] = scores.get(idx, 0) + term_score
+                continue
+
+            for idx, tf in pairs:
+                if keep is not None and idx not in keep:
+                    continue
+                numerator = tf * (self.k1 + 1)
+                denominator = tf + self.k1 * (1 - self.b + self.b * self.doc_lengths[idx] / self.avgdl)
+                term_score = idf * numerator / denominator
+                if weight != 1.0:
+                    term_score *= weight
+                scores[idx] = scores.get(idx, 0) + term_score
+
+        if top_k is not None:
+            return heapq.nlargest(top_k, scores.items(), key=lambda x: (x[1], -x[0]))
+        return sorted(scores.items(), key=lambda x: (-x[1], x[0]))
+
+    def _csr(self):
+        """Term lookup and term-major CSR arrays: (lookup, indptr, docs, tf, idf)"""
+        terms = list(self.postings)
+        counts = [len(self.postings[term]) for term in terms]
+        indptr = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum(counts, out=indptr[1:])
+        nnz = int(indptr[-1])
+
+        docs = np.fromiter((idx for term in terms for idx in self.postings[term]), dtype=np.int64, count=nnz)
+        tf = np.fromiter((self.term_freqs[idx][term] for term in terms for idx in self.postings[term]),
+                         dtype=np.float64, count=nnz)
+        idf = np.array([self.idf[term] for term in terms], dtype=np.float64)
+        return {term: i for i, term in enumerate(terms)}.get, indptr, docs, tf, idf
 
-        for idx, doc in enumerate(self.corpus):
-            score = 0
-            doc_len = self.doc_lengths[idx]
-            term_freqs = defaultdict(int)
-            for word in doc:
-                term_freqs[word] += 1
+    def _csr_fields(self):
+        """Per-field term frequencies (nnz x fields) in _csr() order"""
+        terms = list(self.postings)
+        tfs = np.fromiter((tf for term in terms for idx in self.postings[term] for tf in self.field_freqs[idx][term]),
+                          dtype=np.float64)
+        return tfs.reshape(-1, self.fields)
 
-            for token in query_tokens:
-                if token in self.idf:
-                    tf = term_freqs[token]
-                    idf = self.idf[token]
-                    numerator = tf * (self.k1 + 1)
-                    denominator = tf + self.k1 * (1 - self.b + self.b * doc_len / self.avgdl)
-                    score += idf * numerator / denominator
+    def _build_matrix(self, field_weights=None):
+        """Precompute BM25 (or BM25F) weights as a term-major CSR matrix.
 
-            scores.append((idx, score))
+        Row t holds (doc, weight) for every document containing term t, so
+        a query is the sparse product of its term counts with this matrix.
+        Weights use the same float64 operation order as _score_python, so
+        both backends produce bit-identical scores.
+        """
+        lookup, indptr, docs, tf, term_idf = self._csr()
+        idf = np.repeat(term_idf, np.diff(indptr))
 
-        return sorted(scores, key=lambda x: x[1], reverse=True)
+        if field_weights:
+            field_tfs = np.asarray(self._csr_fields(), dtype=np.float64)
+            scales = np.array(self._field_scales(field_weights), dtype=np.float64).reshape(-1, self.fields)[docs]
+            tf = np.zeros(len(docs), dtype=np.float64)
+            for f in range(self.fields):
+                tf = tf + field_tfs[:, f] * scales[:, f]
+            weights = idf * tf * (self.k1 + 1) / (self.k1 + tf)
+        else:
+            tf = np.asarray(tf, dtype=np.float64)
+            doc_len = np.asarray(self.doc_lengths, dtype=np.float64)[docs]
+            numerator = tf * (self.k1 + 1)
+            denominator = tf + self.k1 * (1 - self.b + self.b * doc_len / self.avgdl)
+            weights = idf * numerator / denominator
+
+        self._matrix[field_weights] = (lookup, indptr, docs, weights)
+        return self._matrix[field_weights]
+
+    def _score_numpy(self, terms, top_k, field_weights=None, allowed=None):
+        lookup, indptr, docs, weights = self._matrix.get(field_weights) or self._build_matrix(field_weights)
+        scores = np.zeros(self.N, dtype=np.float64)
+
+        # Accumulate term by term in query order (matches the Python sum order)
+        for token, weight in terms:
+            t = lookup(token)
+            if t is None:
+                continue
+            lo, hi = indptr[t], indptr[t + 1]
+            scores[docs[lo:hi]] += weights[lo:hi] if weight == 1.0 else weights[lo:hi] * weight
+
+        if allowed is None:
+            hits = np.flatnonzero(scores)
+        else:
+            # Only the allowed documents are read back, in id order
+            mask = np.frombuffer(allowed.to_bytes((self.N + 7) // 8, "little"), dtype=np.uint8)
+            candidates = np.flatnonzero(np.unpackbits(mask, bitorder="little")[:self.N])
+            hits = candidates[scores[candidates] != 0]
+        if top_k is not None and 0 < top_k < len(hits):
+            # Keep everything tied with the k-th best score, then sort that subset
+            kth = np.partition(scores[hits], len(hits) - top_k)[len(hits) - top_k]
+            hits = hits[scores[hits] >= kth]
+        order = hits[np.lexsort((hits, -scores[hits]))]
+        if top_k is not None:
+            order = order[:top_k]
+        return [(int(idx), float(scores[idx])) for idx in order]
+
+
+# ============ ROW STORE ============
+class RowStore:
+    """Compact CSV table: one interned header tuple plus a value tuple per row.
+
+    Cell strings that repeat (severity, platform, category...) share one
+    object. Dicts are built only for the rows a search actually returns.
+    Lookups follow csv.DictReader semantics: short rows read as None for
+    their missing columns, and a duplicated header name maps to its last
+    column.
+    """
+
+    __slots__ = ("columns", "rows", "_col_index", "_facets")
+
+    # Only short values are deduplicated; long free text is rarely repeated
+    _SHARE_MAX_LEN = 64
+
+    def __init__(self, columns, rows):
+        self.columns = tuple(sys.intern(col) for col in columns)
+        self.rows = rows
+        self._col_index = {col: i for i, col in enumerate(self.columns)}
+        self._facets = {}
+
+    @classmethod
+    def from_csv(cls, filepath):
+        import csv
+        with open(filepath, 'r', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            columns = next(reader, [])
+            width = len(columns)
+            shared = {}
+            rows = []
+            for record in reader:
+                if not record:
+                    continue  # DictReader skips blank lines
+                values = [shared.setdefault(v, v) if len(v) <= cls._SHARE_MAX_LEN else v for v in record[:width]]
+                if len(values) < width:
+                    values.extend([None] * (width - len(values)))
+                rows.append(tuple(values))
+        return cls(columns, rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def get(self, idx, col, default=""):
+        """Value of one cell, or default if the column does not exist"""
+        pos = self._col_index.get(col)
+        return default if pos is None else self.rows[idx][pos]
+
+    def project(self, idx, cols):
+        """Materialize row idx as a dict restricted to existing cols"""
+        row = self.rows[idx]
+        return {col: row[self._col_index[col]] for col in cols if col in self._col_index}
+
+    def facet(self, col):
+        """{normalized value: bitmap of the rows holding it} of a column (see
+        facet_bitmaps), built on first use; None if the column does not exist"""
+        facet = self._facets.get(col)
+        if facet is None and col in self._col_index:
+            pos = self._col_index[col]
+            facet = self._facets[col] = facet_bitmaps((row[pos] for row in self.rows), len(self.rows))
+        return facet
+
+    def __getitem__(self, idx):
+        return self.project(idx, self.columns)
+
+
+# ============ FACETS ============
+# Filters (search(..., where={column: value or [values]})) select rows by
+# exact cell value, ignoring case and outer spaces (column names ignore case
+# too): the values given for one column are alternatives, all columns must
+# match. Each column's facet maps its distinct values to int bitmaps (bit i
+# = row i), so a filter is a few ORs and ANDs, and ranking skips every
+# posting outside the result bitmap: it binary-searches each posting list for
+# the allowed rows when they are few (see SPARSE_FILTER_RATIO), else walks the
+# list testing membership. The bundle stores the facets of columns
+# whose values repeat (severity, platform, category...) next to the BM25
+# postings; other columns build theirs on first use.
+def facet_value(value):
+    """Normalized cell value compared by filters"""
+    return value.strip().casefold()
+
+
+def facet_bitmaps(values, size):
+    """{normalized value: row bitmap} of a column's size cell values in row
+    order; missing cells (None) match nothing"""
+    groups = defaultdict(list)
+    for idx, value in enumerate(values):
+        if value is not None:
+            groups[facet_value(value)].append(idx)
+    return {value: _bitmap(ids, size) for value, ids in groups.items()}
+
+
+def _bitmap(ids, size):
+    """Int bitmap of row ids below size"""
+    buf = bytearray((size + 7) // 8)
+    for idx in ids:
+        buf[idx >> 3] |= 1 << (idx & 7)
+    return int.from_bytes(buf, "little")
+
+
+_BYTE_BITS = tuple(tuple(bit for bit in range(8) if byte >> bit & 1) for byte in range(256))
+
+
+@lru_cache(maxsize=256)
+def _bitmap_rows(bitmap):
+    """An int bitmap's set bits as (ascending row ids, frozenset of them);
+    cached, as the same filter tends to be searched again"""
+    buf = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little")
+    ids = tuple(pos << 3 | bit for pos, byte in enumerate(buf) if byte for bit in _BYTE_BITS[byte])
+    return ids, frozenset(ids)
+
+
+def _intersect(ids, docs, values):
+    """(doc, value) pairs of a posting list (ascending docs, parallel values)
+    for the docs in ids (ascending), found by binary search"""
+    lo, hi = 0, len(docs)
+    for idx in ids:
+        lo = bisect_left(docs, idx, lo, hi)
+        if lo == hi:
+            return
+        if docs[lo] == idx:
+            yield idx, values[lo]
+
+
+def _normalize_where(where):
+    """Filters as a sorted tuple of (column, sorted normalized values), () for none.
+
+    where maps a column to one value or a list of alternatives; (column,
+    values) pairs, e.g. an already normalized tuple, are accepted too.
+    """
+    if not where:
+        return ()
+    normalized = []
+    for col, values in (where.items() if isinstance(where, dict) else where):
+        values = values if isinstance(values, (list, tuple, set, frozenset)) else [values]
+        normalized.append((col, tuple(sorted({facet_value(str(value)) for value in values}))))
+    return tuple(sorted(normalized))
+
+
+def _find_column(columns, col):
+    """The column of columns named col, compared exactly, then ignoring case"""
+    if col in columns:
+        return col
+    folded = col.casefold()
+    return next((column for column in columns if column.casefold() == folded), None)
+
+
+def _where_error(where, columns):
+    """Error message if a filter column is not among columns, else None"""
+    missing = [col for col, _ in where if _find_column(columns, col) is None]
+    if not missing:
+        return None
+    return f"Unknown filter column: {', '.join(missing)}. Available: {', '.join(columns)}"
+
+
+def _filter_rows(data, where):
+    """Bitmap of the rows of data matching every filter, None for no filter.
+
+    A column data lacks matches no row.
+    """
+    if not where:
+        return None
+    rows = (1 << len(data)) - 1
+    for col, values in where:
+        col = _find_column(data.columns, col)
+        if col is None:
+            return 0
+        facet = data.facet(col)
+        match = 0
+        for value in values:
+            match |= facet.get(value, 0)
+        rows &= match
+        if not rows:
+            break
+    return rows
+
+
+# ============ PERSISTENT INDEX ============
+# Every configured CSV (CSV_CONFIG domains and STACK_CONFIG stacks) is compiled
+# into one memory-mapped bundle under INDEX_DIR (see bundle.py). The bundle is
+# content-addressed and shared by every copy of the skill using the same
+# INDEX_DIR: a CSV path maps to the sha256 of its contents, and one section per
+# distinct (sha256, search_cols) serves all paths with that content. A path is
+# current while its CSV keeps the recorded mtime/size or, failing that, the
+# same content hash; any changed CSV triggers a bundle rebuild, which carries
+# over the sections other data dirs still use. The bundle also holds each
+# data dir's union vocabulary, so known_term() loads no index. Loaded indexes
+# are also cached in memory per process; when a cached CSV changes under a
+# long-running process (the search daemon), its index is updated incrementally
+# instead (BM25.updated), and a later bundle rebuild reuses that index. The
+# cache is shared by all threads;
+# a per-file lock makes concurrent cold lookups of the same CSV load it once
+# while different CSVs load in parallel. Warm lookups take no lock: an entry
+# is replaced whole, a loaded (rows, bm25) is never modified, and its lazily
+# built extras (score matrices, fuzzy vocabulary, facets) are only stored
+# once complete, so racing readers at worst build one twice.
+BUNDLE_FILE = "bundle.bin"
+_BUNDLE = None
+_BUNDLE_LOCK = threading.Lock()
+_INDEX_CACHE = {}
+_KNOWN_TERMS = ((), {})  # (data_stamps(), {token: known_term(token)})
+KNOWN_TERMS_MAX = 4096
+_INDEX_LOCKS = defaultdict(threading.Lock)
+_INDEX_LOCKS_GUARD = threading.Lock()
+
+
+def _make_index_dir():
+    """Create INDEX_DIR, with a .gitignore keeping it out of the project's repository"""
+    INDEX_DIR.mkdir(parents=True, exist_ok=True)
+    ignore = INDEX_DIR / ".gitignore"
+    if not ignore.exists():
+        ignore.write_text("*\n", encoding="utf-8")
+
+
+def _file_hash(filepath):
+    """SHA-256 of file contents"""
+    import hashlib
+    return hashlib.sha256(filepath.read_bytes()).hexdigest()
+
+
+def _bundle_targets():
+    """(relative file, search_cols) of every CSV compiled into the bundle"""
+    targets = {(config["file"], tuple(config["search_cols"])) for config in CSV_CONFIG.values()}
+    targets |= {(config["file"], tuple(_STACK_COLS["search_cols"])) for config in STACK_CONFIG.values()}
+    return sorted(targets)
+
+
+@lru_cache(maxsize=None)
+def _data_files():
+    """Every domain and stack CSV, relative to DATA_DIR"""
+    return tuple(sorted({rel for rel, _ in _bundle_targets()}))
+
+
+@lru_cache(maxsize=None)
+def _data_paths():
+    """_data_files() as paths, for data_stamps()"""
+    return tuple(str(DATA_DIR / rel) for rel in _data_files())
+
+
+@lru_cache(maxsize=None)
+def _data_dir_key():
+    """DATA_DIR as the bundle records it, for its vocabularies"""
+    return str(DATA_DIR.resolve())
+
+
+def _stamp(path):
+    """(mtime_ns, size) of a file, or None if it is missing"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def data_stamps():
+    """Stamps of every domain and stack CSV: whether a query token expands
+    fuzzily depends on all of them (see known_term)"""
+    return tuple(_stamp(path) for path in _data_paths())
+
+
+def _data_relpath(filepath):
+    try:
+        return filepath.resolve().relative_to(DATA_DIR.resolve()).as_posix()
+    except ValueError:
+        return None
+
+
+def _documents(data, search_cols):
+    """One BM25 document per row: the tuple of its search column values (fields)"""
+    return [tuple(str(data.get(idx, col)) for col in search_cols) for idx in range(len(data))]
+
+
+def _fit_index(filepath, search_cols):
+    """Parse a CSV and fit a BM25 index over its search columns"""
+    data = _load_csv(filepath)
+    bm25 = BM25()
+    bm25.fit(_documents(data, search_cols))
+    return data, bm25
+
+
+def _refresh_index(filepath, search_cols, rows, bm25):
+    """Parse an edited CSV and update its previously loaded (rows, bm25)"""
+    data = _load_csv(filepath)
+    if not isinstance(rows, RowStore):
+        # Mapped from the bundle: copy into memory first (no re-tokenizing)
+        bm25 = bm25.thaw([_doc_hash(doc) for doc in _documents(rows, search_cols)])
+    return data, bm25.updated(_documents(data, search_cols))
+
+
+def _open_bundle():
+    """The current bundle (reopened if the file was replaced), or None"""
+    global _BUNDLE
+    path = INDEX_DIR / BUNDLE_FILE
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    if _BUNDLE is not None and (_BUNDLE.stat.st_ino, _BUNDLE.stat.st_size) == (stat.st_ino, stat.st_size):
+        return _BUNDLE
+
+    from bundle import Bundle
+    try:
+        _BUNDLE = Bundle(path, INDEX_VERSION, TOKENIZER_SIGNATURE)
+    except (OSError, ValueError):
+        return None
+    return _BUNDLE
+
+
+def _source_current(bundle, i, filepath, stat):
+    """Whether bundle source i still records the content of the CSV at filepath"""
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    recorded = bundle.stamp(i)
+    if recorded == stamp:
+        return True
+
+    # mtime changed (checkout, touch): keep the source if the content did not
+    if recorded[1] == stat.st_size and bundle.sources[i]["sha256"] == _file_hash(filepath):
+        try:
+            bundle.restamp(i, stamp)
+        except OSError:
+            pass
+        return True
+    return False
+
+
+def _bundled_section(bundle, filepath, search_cols, stat):
+    """Section of bundle indexing the current content of filepath, or None"""
+    i = bundle.source(str(filepath.resolve()))
+    if i is None or not _source_current(bundle, i, filepath, stat):
+        return None
+    return bundle.section(bundle.sources[i]["sha256"], search_cols)
+
+
+def _bundled_vocabulary(bundle, stamps):
+    """DATA_DIR's union vocabulary in bundle if built from the CSVs with
+    these data_stamps(), else None"""
+    vocabulary = bundle.vocabulary(_data_dir_key())
+    if vocabulary is None:
+        return None
+    for rel, stamp in zip(_data_files(), stamps):
+        source = vocabulary.files.get(rel)
+        if source is None or stamp is None:
+            if source is not None or stamp is not None:
+                return None
+            continue
+        i = bundle.source(source)
+        if i is None or bundle.stamp(i) != stamp:
+            return None
+    return vocabulary
+
+
+def build_bundle(force=False):
+    """Compile every configured CSV into the bundle unless all are current.
+
+    Sections whose content is already compiled (by an earlier build or
+    another copy of the skill) are copied instead of refitted, unless
+    force is set. Sources of other data dirs sharing INDEX_DIR are kept
+    while their CSVs are unchanged. Returns the bundle path, or None if it
+    could not be written.
+    """
+    with _BUNDLE_LOCK:
+        targets = [(DATA_DIR / rel, cols) for rel, cols in _bundle_targets() if (DATA_DIR / rel).exists()]
+        bundle = _open_bundle()
+        if not force and bundle is not None and all(
+                _bundled_section(bundle, filepath, cols, filepath.stat()) is not None for filepath, cols in targets
+        ) and _bundled_vocabulary(bundle, data_stamps()) is not None:
+            return bundle.path
+
+        sources, sections = {}, {}
+        if bundle is not None:
+            # Keep other data dirs' sources (and their sections) while unchanged
+            for i, source in enumerate(bundle.sources):
+                path = Path(source["path"])
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                if _data_relpath(path) is not None or bundle.stamp(i) != (stat.st_mtime_ns, stat.st_size):
+                    continue
+                sources[source["path"]] = (source["sha256"], bundle.stamp(i))
+                for j, section in enumerate(bundle.sections):
+                    if section["sha256"] == source["sha256"]:
+                        sections[(section["sha256"], tuple(section["search_cols"]))] = (bundle, j)
+
+        keys = []
+        for filepath, cols in targets:
+            stat = filepath.stat()  # before reading, so a concurrent edit looks stale
+            sha256 = _file_hash(filepath)
+            sources[str(filepath.resolve())] = (sha256, (stat.st_mtime_ns, stat.st_size))
+            key = (sha256, tuple(cols))
+            keys.append(key)
+            if key in sections and not (force and len(sections[key]) == 2):
+                continue
+            j = bundle.section(sha256, cols) if bundle is not None and not force else None
+            if j is not None:
+                sections[key] = (bundle, j)
+                continue
+            cached = _INDEX_CACHE.get((str(filepath), cols))
+            if cached and cached[0] == (stat.st_mtime_ns, stat.st_size) and isinstance(cached[1], RowStore):
+                rows, bm25 = cached[1], cached[2]
+            else:
+                rows, bm25 = _fit_index(filepath, cols)
+            sections[key] = ({"sha256": sha256, "search_cols": list(cols)}, rows, bm25)
+
+        from bundle import MappedBM25, write_bundle
+        # Union vocabulary of this data dir; other data dirs' carry over
+        # while all their sources do
+        terms = set()
+        for key in keys:
+            section = sections[key]
+            terms.update(MappedBM25(*section)._terms() if len(section) == 2 else section[2].idf)
+        files = {filepath.relative_to(DATA_DIR).as_posix(): str(filepath.resolve()) for filepath, _ in targets}
+        vocabularies = [(_data_dir_key(), files, terms)]
+        if bundle is not None:
+            vocabularies += [(bundle, data_dir) for data_dir, entry in bundle.vocabularies.items()
+                             if data_dir != _data_dir_key() and all(p in sources for p in entry["files"].values())]
+
+        path = INDEX_DIR / BUNDLE_FILE
+        try:
+            _make_index_dir()
+            write_bundle(path, [(source, sha256, stamp) for source, (sha256, stamp) in sorted(sources.items())],
+                         list(sections.values()), INDEX_VERSION, TOKENIZER_SIGNATURE, vocabularies)
+        except OSError:
+            return None
+        return path
+
+
+def _load_bundled(filepath, stat, search_cols):
+    """(rows, bm25) mapped from the bundle, rebuilding it if the CSV changed.
+
+    Returns None for CSVs that are not part of the bundle or when the bundle
+    cannot be written; callers then fit the index in memory.
+    """
+    rel = _data_relpath(filepath)
+    if rel is None or (rel, tuple(search_cols)) not in _bundle_targets():
+        return None
+
+    bundle = _open_bundle()
+    i = _bundled_section(bundle, filepath, search_cols, stat) if bundle else None
+    if i is None:
+        if build_bundle() is None:
+            return None
+        bundle = _open_bundle()
+        i = _bundled_section(bundle, filepath, search_cols, stat) if bundle else None
+        if i is None:
+            return None
+
+    from bundle import MappedBM25, MappedRowStore
+    return MappedRowStore(bundle, i), MappedBM25(bundle, i)
+
+
+def load_index(filepath, search_cols):
+    """Return (rows, bm25) for a CSV, reusing cached indexes when current"""
+    stat = filepath.stat()
+    key = (str(filepath), tuple(search_cols))
+    cached = _INDEX_CACHE.get(key)
+    if cached and cached[0] == (stat.st_mtime_ns, stat.st_size):
+        return cached[1], cached[2]
+
+    with _INDEX_LOCKS_GUARD:
+        lock = _INDEX_LOCKS[key]
+    with lock:
+        # Another thread may have loaded it while we waited
+        cached = _INDEX_CACHE.get(key)
+        if cached and cached[0] == (stat.st_mtime_ns, stat.st_size):
+            return cached[1], cached[2]
+
+        if cached:
+            # Changed since this process loaded it: patch rather than rebuild
+            rows, bm25 = _refresh_index(filepath, search_cols, cached[1], cached[2])
+        else:
+            rows, bm25 = _load_bundled(filepath, stat, search_cols) or _fit_index(filepath, search_cols)
+        _INDEX_CACHE[key] = ((stat.st_mtime_ns, stat.st_size), rows, bm25)
+    return rows, bm25
+
+
+def _all_indexes():
+    """(rows, bm25) of every domain and stack whose CSV exists"""
+    targets = [(config["file"], config["search_cols"]) for config in CSV_CONFIG.values()]
+    targets += [(config["file"], _STACK_COLS["search_cols"]) for config in STACK_CONFIG.values()]
+    for filename, search_cols in targets:
+        filepath = DATA_DIR / filename
+        if filepath.exists():
+            yield load_index(filepath, search_cols)
+
+
+def warm_indexes():
+    """Load every domain and stack index into the in-process cache"""
+    for _ in _all_indexes():
+        pass
+
+
+def known_term(token):
+    """Whether any domain or stack index has token as a term: a word the
+    data uses, so spelled correctly even where the searched index lacks it.
+
+    Answered from the bundle's union vocabulary, rebuilt first if the CSVs
+    changed, else (bundle not writable) by loading every index.
+    """
+    global _KNOWN_TERMS
+    stamps = data_stamps()
+    memo_stamps, memo = _KNOWN_TERMS
+    if memo_stamps != stamps or len(memo) >= KNOWN_TERMS_MAX:
+        memo = {}
+        _KNOWN_TERMS = (stamps, memo)
+    known = memo.get(token)
+    if known is None:
+        bundle = _open_bundle()
+        vocabulary = _bundled_vocabulary(bundle, stamps) if bundle is not None else None
+        if vocabulary is None and build_bundle() is not None:
+            bundle = _open_bundle()
+            vocabulary = _bundled_vocabulary(bundle, stamps) if bundle is not None else None
+        if vocabulary is not None:
+            known = token in vocabulary
+        else:
+            known = any(bm25._term_idf(token) is not None for _, bm25 in _all_indexes())
+        memo[token] = known
+    return known
+
+
+def engine_signature():
+    """What a search daemon must share with a client to answer for it: same
+    data, index format and tokenizer"""
+    return {"data_dir": str(DATA_DIR.resolve()), "index_version": INDEX_VERSION, "tokenizer": TOKENIZER_SIGNATURE}
+
+
+# ============ RESULT CACHE ============
+# Finished search()/search_stack()/search_many() results persist in SQLite
+# under INDEX_DIR (see result_cache.py), shared across processes and
+# sessions. A key is the query's normalized tokens (ranking sees nothing
+# else), the target and options, and a version: the format/tokenizer/fuzzy
+# settings, the target's config and the (mtime, size) of every CSV it reads,
+# so editing a CSV or the config misses instead of serving stale results.
+# A result for which fuzzy matching consulted known_term depends on every
+# CSV: it is stored with data_stamps(), and a hit must still match them.
+# A hit returns without loading or ranking any index. Errors are not cached.
+RESULT_CACHE_FILE = "results.sqlite"
+_DATA_STAMPS_FIELD = "_data_stamps"
+_RESULT_CACHE = None
+_RESULT_CACHE_LOCK = threading.Lock()
+
+
+def _result_cache():
+    """The process's ResultCache, opened on first use, or None if disabled"""
+    global _RESULT_CACHE
+    if not RESULT_CACHE:
+        return None
+    if _RESULT_CACHE is None:
+        with _RESULT_CACHE_LOCK:
+            if _RESULT_CACHE is None:
+                from result_cache import ResultCache
+                try:
+                    _make_index_dir()
+                except OSError:
+                    pass  # ResultCache then finds it unusable and disables itself
+                _RESULT_CACHE = ResultCache(INDEX_DIR / RESULT_CACHE_FILE, RESULT_CACHE_TTL, RESULT_CACHE_MAX_ENTRIES)
+    return _RESULT_CACHE if _RESULT_CACHE.enabled else None
+
+
+@lru_cache(maxsize=None)
+def _cache_target(kind, name):
+    """(engine settings and config of a target as text, CSV paths it reads)"""
+    if kind == "stack":
+        configs = [dict(STACK_CONFIG[name], **_STACK_COLS)]
+    elif name == "all":
+        configs = list(CSV_CONFIG.values())
+    else:
+        configs = [CSV_CONFIG.get(name, CSV_CONFIG["style"])]
+    # The CSV paths too: copies of the skill share INDEX_DIR, not their data
+    paths = tuple(str(DATA_DIR / config["file"]) for config in configs)
+    settings = (INDEX_VERSION, TOKENIZER_SIGNATURE, FUZZY_MATCHING, FUZZY_MIN_LEN, FUZZY_MAX_EXPANSIONS,
+                FUZZY_MIN_SIMILARITY, FUZZY_TYPO_MIN_LEN, FUZZY_TYPO_MIN_SIMILARITY, FUZZY_MAX_EDITS, kind, name,
+                configs, paths)
+    return repr(settings), paths
+
+
+def _cache_key(kind, name, query, max_results, fields, where=()):
+    """Result cache key of a search ("domain" or "stack" kind) of target name
+    (where normalized, see _normalize_where)"""
+    signature, paths = _cache_target(kind, name)
+    stamps = [_stamp(path) for path in paths]
+    return repr((tokenize_query(query), max_results, tuple(fields or ()), where, stamps, signature))
+
+
+def _consults_all_data(kind, name, query):
+    """Whether ranking query against the target asks known_term() about a
+    token, making the result depend on every CSV"""
+    tokens = [token for token in tokenize_query(query) if len(token) >= FUZZY_MIN_LEN]
+    if not FUZZY_MATCHING or not tokens:
+        return False
+    if kind == "stack":
+        configs = [dict(STACK_CONFIG[name], **_STACK_COLS)]
+    elif name == "all":
+        configs = list(CSV_CONFIG.values())
+    else:
+        configs = [CSV_CONFIG.get(name, CSV_CONFIG["style"])]
+    for config in configs:
+        filepath = DATA_DIR / config["file"]
+        if filepath.exists():
+            _, bm25 = load_index(filepath, config["search_cols"])
+            if any(bm25._term_idf(token) is None for token in tokens):
+                return True
+    return False
+
+
+def _cache_hit(cache, key, query):
+    """Cached result for key, carrying this query's own text, or None"""
+    result = cache.get(key)
+    if result is not None:
+        stamps = result.pop(_DATA_STAMPS_FIELD, None)
+        if stamps is not None and stamps != repr(data_stamps()):
+            return None
+        result["query"] = query
+    return result
+
+
+def _cache_put(cache, key, result, kind, name, query):
+    """Store result under key, with data_stamps() if it depends on every CSV"""
+    if _consults_all_data(kind, name, query):
+        result = dict(result, **{_DATA_STAMPS_FIELD: repr(data_stamps())})
+    cache.put(key, result)
+
+
+def _cached(cache, kind, name, query, max_results, fields, where, compute):
+    """compute() answered from / stored into the result cache when cache is set"""
+    store = _result_cache() if cache else None
+    if store is None:
+        return compute()
+    key = _cache_key(kind, name, query, max_results, fields, where)
+    result = _cache_hit(store, key, query)
+    if result is None:
+        result = compute()
+        if "error" not in result:
+            _cache_put(store, key, result, kind, name, query)
+    return result
+
+
+def cache_stats():
+    """Counters and settings of the persistent result cache"""
+    cache = _result_cache()
+    if cache is None:
+        return {"enabled": False, "path": str(INDEX_DIR / RESULT_CACHE_FILE)}
+    return cache.stats()
 
 
 # ============ SEARCH FUNCTIONS ============
 def _load_csv(filepath):
-    """Load CSV and return list of dicts"""
-    with open(filepath, 'r', encoding='utf-8') as f:
-        return list(csv.DictReader(f))
+    """Load CSV into a RowStore"""
+    return RowStore.from_csv(filepath)
 
 
-def _search_csv(filepath, search_cols, output_cols, query, max_results):
-    """Core search function using BM25"""
+def _search_csv(filepath, search_cols, output_cols, query, max_results, field_weights=None, where=()):
+    """Core search function using BM25 (BM25F with field_weights) over the
+    rows matching where"""
     if not filepath.exists():
         return []
 
-    data = _load_csv(filepath)
-
-    # Build documents from search columns
-    documents = [" ".join(str(row.get(col, "")) for col in search_cols) for row in data]
+    data, bm25 = load_index(filepath, search_cols)
+    return _rank(data, bm25, output_cols, query, max_results, field_weights, where)
 
-    # BM25 search
-    bm25 = BM25()
-    bm25.fit(documents)
-    ranked = bm25.score(query)
 
-    # Get top results with score > 0
-    results = []
-    for idx, score in ranked[:max_results]:
+def _iter_rank(data, bm25, output_cols, query, max_results, field_weights=None, where=()):
+    """Rank a loaded index, yielding each top hit projected to output_cols"""
+    allowed = _filter_rows(data, where)
+    for idx, score in bm25.score(query, top_k=max_results, field_weights=field_weights, allowed=allowed):
+        # Only results with score > 0
         if score > 0:
-            row = data[idx]
-            results.append({col: row.get(col, "") for col in output_cols if col in row})
+            yield data.project(idx, output_cols)
 
-    return results
+
+def _rank(data, bm25, output_cols, query, max_results, field_weights=None, where=()):
+    """Rank a loaded index and project the top hits to output_cols"""
+    return list(_iter_rank(data, bm25, output_cols, query, max_results, field_weights, where))
+
+
+def _check_where(filepath, search_cols, where):
+    """Error message if a filter names a column the CSV lacks, else None.
+
+    Such a filter matches no row: code that ranks before checking only
+    needs to call this when nothing matched.
+    """
+    if not where:
+        return None
+    data, _ = load_index(filepath, search_cols)
+    return _where_error(where, data.columns)
+
+
+def _field_weights(config):
+    """BM25F weights of a CSV_CONFIG / _STACK_COLS entry, one per search column
+    (unlisted columns weigh 1), or None for plain BM25"""
+    weights = config.get("search_weights")
+    if not weights:
+        return None
+    return tuple(float(weights.get(col, 1.0)) for col in config["search_cols"])
+
+
+def _select_cols(output_cols, fields):
+    """output_cols narrowed to the requested fields (in request order), if any"""
+    if not fields:
+        return output_cols
+    return [field for field in fields if field in output_cols]
 
 
 def detect_domain(query):
@@ -214,10 +1382,57 @@ def detect_domain(query):
     return best if scores[best] > 0 else "style"
 
 
-def search(query, domain=None, max_results=MAX_RESULTS):
-    """Main search function with auto-domain detection"""
+def _where_dict(where):
+    """Normalized filters as the "where" entry of a result"""
+    return {col: list(values) for col, values in where}
+
+
+def _domain_result(domain, config, query, results, where=()):
+    result = {
+        "domain": domain,
+        "query": query,
+        "file": config["file"],
+        "count": len(results),
+        "results": results
+    }
+    if where:
+        result["where"] = _where_dict(where)
+    return result
+
+
+def _stack_result(stack, query, results, where=()):
+    result = {
+        "domain": "stack",
+        "stack": stack,
+        "query": query,
+        "file": STACK_CONFIG[stack]["file"],
+        "count": len(results),
+        "results": results
+    }
+    if where:
+        result["where"] = _where_dict(where)
+    return result
+
+
+def search(query, domain=None, max_results=MAX_RESULTS, fields=None, cache=True, where=None):
+    """Main search function with auto-domain detection ("all" searches every domain).
+
+    fields optionally restricts (and orders) the output columns of each result.
+    cache=False bypasses the persistent result cache.
+    where ({column: value or [values]}) ranks only the rows whose cells
+    match (see FACETS), e.g. {"Severity": "High", "Platform": ["Web", "All"]}.
+    """
     if domain is None:
         domain = detect_domain(query)
+    where = _normalize_where(where)
+    return _cached(cache, "domain", domain, query, max_results, fields, where,
+                   lambda: _search_domain(query, domain, max_results, fields, where))
+
+
+def _search_domain(query, domain, max_results, fields, where=()):
+    """search() of a resolved domain with normalized filters, uncached"""
+    if domain == "all":
+        return search_all(query, max_results, fields, where)
 
     config = CSV_CONFIG.get(domain, CSV_CONFIG["style"])
     filepath = DATA_DIR / config["file"]
@@ -225,34 +1440,246 @@ def search(query, domain=None, max_results=MAX_RESULTS):
     if not filepath.exists():
         return {"error": f"File not found: {filepath}", "domain": domain}
 
-    results = _search_csv(filepath, config["search_cols"], config["output_cols"], query, max_results)
+    results = _search_csv(filepath, config["search_cols"], _select_cols(config["output_cols"], fields), query, max_results,
+                          _field_weights(config), where)
+    error = _check_where(filepath, config["search_cols"], where) if not results else None
+    if error:
+        return {"error": error, "domain": domain}
 
-    return {
-        "domain": domain,
+    return _domain_result(domain, config, query, results, where)
+
+
+def search_all(query, max_results=MAX_RESULTS, fields=None, where=None):
+    """Search every CSV_CONFIG domain in one pass and blend the rankings.
+
+    Each domain's BM25 scores are divided by that domain's score bound for
+    the query and weighted by how many query tokens the domain knows, so
+    hits from small and large CSVs compete on one scale. Each result row
+    carries its "Domain" unless fields leaves it out. Filters (where, as
+    in search()) skip the domains lacking one of their columns.
+
+    The domains keep their own indexes rather than one merged index: idf
+    and length normalization are per-corpus statistics, and merged ones
+    would let the large CSVs reweight every other domain's terms. The
+    query is tokenized once and each index is already loaded from the
+    bundle, so the blend costs one call, not one per domain.
+    """
+    tokens = tokenize_query(query)
+    where = _normalize_where(where)
+
+    hits, columns = [], set()
+    for order, (domain, config) in enumerate(CSV_CONFIG.items()):
+        filepath = DATA_DIR / config["file"]
+        if not filepath.exists():
+            continue
+        data, bm25 = load_index(filepath, config["search_cols"])
+        columns.update(data.columns)
+        allowed = _filter_rows(data, where)
+        if allowed == 0:
+            continue
+        bound, coverage = bm25.score_bound(tokens)
+        if not bound:
+            continue
+        for idx, score in bm25.score_tokens(tokens, top_k=max_results, field_weights=_field_weights(config),
+                                            allowed=allowed):
+            hits.append((score / bound * coverage, order, idx, domain, data))
+
+    missing = [col for col, _ in where if _find_column(columns, col) is None]
+    if missing:
+        return {"error": f"Unknown filter column: {', '.join(missing)}. No domain has it", "domain": "all"}
+
+    hits = heapq.nsmallest(max_results, hits, key=lambda hit: (-hit[0], hit[1], hit[2]))
+    results = []
+    for _, _, idx, domain, data in hits:
+        row = data.project(idx, _select_cols(CSV_CONFIG[domain]["output_cols"], fields))
+        results.append(dict({"Domain": domain}, **row) if not fields or "Domain" in fields else row)
+
+    result = {
+        "domain": "all",
         "query": query,
-        "file": config["file"],
+        "file": ", ".join(dict.fromkeys(CSV_CONFIG[hit[3]]["file"] for hit in hits)) or "*",
         "count": len(results),
         "results": results
     }
+    if where:
+        result["where"] = _where_dict(where)
+    return result
 
 
-def search_stack(query, stack, max_results=MAX_RESULTS):
-    """Search stack-specific guidelines"""
+def search_stack(query, stack, max_results=MAX_RESULTS, fields=None, cache=True, where=None):
+    """Search stack-specific guidelines (fields, cache and where as in search())"""
     if stack not in STACK_CONFIG:
         return {"error": f"Unknown stack: {stack}. Available: {', '.join(AVAILABLE_STACKS)}"}
+    where = _normalize_where(where)
+    return _cached(cache, "stack", stack, query, max_results, fields, where,
+                   lambda: _search_stack(query, stack, max_results, fields, where))
+
 
+def _search_stack(query, stack, max_results, fields, where=()):
+    """search_stack() of a known stack with normalized filters, uncached"""
     filepath = DATA_DIR / STACK_CONFIG[stack]["file"]
 
     if not filepath.exists():
         return {"error": f"Stack file not found: {filepath}", "stack": stack}
 
-    results = _search_csv(filepath, _STACK_COLS["search_cols"], _STACK_COLS["output_cols"], query, max_results)
+    results = _search_csv(filepath, _STACK_COLS["search_cols"], _select_cols(_STACK_COLS["output_cols"], fields),
+                          query, max_results, _field_weights(_STACK_COLS), where)
+    error = _check_where(filepath, _STACK_COLS["search_cols"], where) if not results else None
+    if error:
+        return {"error": error, "stack": stack}
 
-    return {
-        "domain": "stack",
-        "stack": stack,
-        "query": query,
-        "file": STACK_CONFIG[stack]["file"],
-        "count": len(results),
-        "results": results
-    }
+    return _stack_result(stack, query, results, where)
+
+
+def stream_search(query, domain=None, stack=None, max_results=MAX_RESULTS, fields=None, cache=True, where=None):
+    """search() / search_stack() as a generator, for streaming output.
+
+    Yields the result dict without "count" and "results" first, then each
+    result row as soon as it is materialized. An error dict is yielded alone.
+    A cached result is replayed; a fully consumed stream is cached.
+    """
+    normalized = _normalize_where(where)
+    if stack:
+        config = STACK_CONFIG.get(stack)
+        filepath = DATA_DIR / config["file"] if config else None
+        if filepath is None or not filepath.exists():
+            yield search_stack(query, stack)
+            return
+        kind, name = "stack", stack
+        header = _stack_result(stack, query, [], normalized)
+        config = _STACK_COLS
+    else:
+        domain = domain or detect_domain(query)
+        config = CSV_CONFIG.get(domain, CSV_CONFIG["style"])
+        filepath = DATA_DIR / config["file"]
+        if domain == "all" or not filepath.exists():
+            # Blending needs every domain ranked first; errors come back whole
+            result = search(query, domain, max_results, fields, cache, where)
+            yield {key: value for key, value in result.items() if key not in ("count", "results")}
+            yield from result.get("results", ())
+            return
+        kind, name = "domain", domain
+        header = _domain_result(domain, config, query, [], normalized)
+
+    # Like search(), a hit is replayed without loading the index
+    store = _result_cache() if cache else None
+    cache_key = _cache_key(kind, name, query, max_results, fields, normalized) if store is not None else None
+    result = _cache_hit(store, cache_key, query) if store is not None else None
+    if result is not None:
+        yield {key: value for key, value in result.items() if key not in ("count", "results")}
+        yield from result["results"]
+        return
+
+    error = _check_where(filepath, config["search_cols"], normalized)
+    if error:
+        yield {"error": error, kind: name}
+        return
+
+    del header["count"], header["results"]
+    yield header
+    data, bm25 = load_index(filepath, config["search_cols"])
+    rows = []
+    for row in _iter_rank(data, bm25, _select_cols(config["output_cols"], fields), query, max_results,
+                          _field_weights(config), normalized):
+        rows.append(row)
+        yield row
+    if store is not None:
+        _cache_put(store, cache_key, dict(header, count=len(rows), results=rows), kind, name, query)
+
+
+def request_error(request):
+    """Why a search_many() query dict is malformed, or None if it is not"""
+    if not isinstance(request, dict):
+        return "expected a string or an object with a \"query\" field"
+    if not isinstance(request.get("query"), str):
+        return "\"query\" must be a string"
+    for key in ("domain", "stack"):
+        if request.get(key) is not None and not isinstance(request[key], str):
+            return f"\"{key}\" must be a string"
+    max_results = request.get("max_results", MAX_RESULTS)
+    if not isinstance(max_results, int) or isinstance(max_results, bool) or max_results < 1:
+        return "\"max_results\" must be a positive integer"
+    fields = request.get("fields")
+    if fields is not None and not (isinstance(fields, list) and all(isinstance(f, str) for f in fields)):
+        return "\"fields\" must be a list of column names"
+    if request.get("where") is not None and not isinstance(request["where"], dict):
+        return "\"where\" must be an object mapping columns to values"
+    return None
+
+
+def search_many(queries, cache=True):
+    """Answer a batch of queries, loading each domain/stack index once.
+
+    Each query is a string or a dict with "query" and optional "domain",
+    "stack", "max_results", "fields" and "where". Returns one
+    search()/search_stack() shaped result per query, in input order; a
+    malformed query (see request_error()) gets {"error": ...} and the others
+    are still answered. Queries found in the result cache (unless
+    cache=False) skip their index entirely.
+    """
+    requests = [{"query": q} if isinstance(q, str) else q for q in queries]
+    store = _result_cache() if cache else None
+
+    results = [None] * len(requests)
+    for pos, request in enumerate(requests):
+        error = request_error(request)
+        if error:
+            results[pos] = {"error": error}
+    wheres = [_normalize_where(request.get("where")) if results[pos] is None else ()
+              for pos, request in enumerate(requests)]
+    keys = {}
+    groups = defaultdict(list)
+    for pos, request in enumerate(requests):
+        if results[pos] is not None:
+            continue
+        if request.get("stack"):
+            target = ("stack", request["stack"])
+        else:
+            target = ("domain", request.get("domain") or detect_domain(request["query"]))
+        if store is not None and (target[0] == "domain" or target[1] in STACK_CONFIG):
+            keys[pos] = (_cache_key(*target, request["query"], request.get("max_results", MAX_RESULTS),
+                                    request.get("fields"), wheres[pos]), target)
+            results[pos] = _cache_hit(store, keys[pos][0], request["query"])
+            if results[pos] is not None:
+                del keys[pos]
+                continue
+        groups[target].append(pos)
+
+    for (kind, name), positions in groups.items():
+        if name == "all" and kind == "domain":
+            for pos in positions:
+                request = requests[pos]
+                results[pos] = search_all(request["query"], request.get("max_results", MAX_RESULTS), request.get("fields"),
+                                          wheres[pos])
+            continue
+        if kind == "stack":
+            filepath = DATA_DIR / STACK_CONFIG[name]["file"] if name in STACK_CONFIG else None
+            config = _STACK_COLS
+        else:
+            config = CSV_CONFIG.get(name, CSV_CONFIG["style"])
+            filepath = DATA_DIR / config["file"]
+
+        if filepath is None or not filepath.exists():
+            # Unknown stack / missing file: let the single-query path build the error
+            for pos in positions:
+                request = requests[pos]
+                results[pos] = (search_stack(request["query"], name, cache=False) if kind == "stack"
+                                else search(request["query"], name, cache=False))
+            continue
+
+        data, bm25 = load_index(filepath, config["search_cols"])
+        for pos in positions:
+            request = requests[pos]
+            hits = _rank(data, bm25, _select_cols(config["output_cols"], request.get("fields")), request["query"],
+                         request.get("max_results", MAX_RESULTS), _field_weights(config), wheres[pos])
+            error = _where_error(wheres[pos], data.columns) if not hits else None
+            if error:
+                results[pos] = {"error": error, kind: name}
+                continue
+            results[pos] = (_stack_result(name, request["query"], hits, wheres[pos]) if kind == "stack"
+                            else _domain_result(name, config, request["query"], hits, wheres[pos]))
+
+    for pos, (key, (kind, name)) in keys.items():
+        if "error" not in results[pos]:
+            _cache_put(store, key, results[pos], kind, name, requests[pos]["query"])
+    return results
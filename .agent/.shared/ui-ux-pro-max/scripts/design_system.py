@@ -11,8 +11,11 @@ Usage:
 
 import csv
 import json
+from bisect import bisect_right
+from collections import deque
+from functools import lru_cache
 from pathlib import Path
-from core import search, DATA_DIR
+from core import search, data_stamps, CSV_CONFIG, DATA_DIR, FUZZY_MATCHING
 
 
 # ============ CONFIGURATION ============
@@ -26,6 +29,121 @@ SEARCH_CONFIG = {
     "typography": {"max_results": 2}
 }
 
+# Rendered design systems kept by generate_design_system (LRU)
+RESULT_CACHE_SIZE = 128
+
+
+# ============ RULE LOOKUP ============
+class SubstringMatcher:
+    """Aho-Corasick automaton over a set of patterns.
+
+    first_match(text) returns the smallest value among all patterns that
+    occur in text, in a single pass over text regardless of pattern count.
+    """
+
+    def __init__(self, patterns: dict):
+        self._goto = [{}]
+        self._fail = [0]
+        self._best = [None]  # smallest value of any pattern ending at this node
+
+        for pattern, value in patterns.items():
+            node = 0
+            for ch in pattern:
+                child = self._goto[node].get(ch)
+                if child is None:
+                    child = len(self._goto)
+                    self._goto[node][ch] = child
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._best.append(None)
+                node = child
+            self._best[node] = self._min(self._best[node], value)
+
+        # Breadth-first: fail links point to the longest proper suffix in the trie
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(ch, 0)
+                self._best[child] = self._min(self._best[child], self._best[self._fail[child]])
+
+    @staticmethod
+    def _min(a, b):
+        if a is None:
+            return b
+        return a if b is None or a <= b else b
+
+    def first_match(self, text: str):
+        """Smallest value of any pattern contained in text, or None."""
+        best = self._best[0]  # empty pattern matches everything
+        node = 0
+        for ch in text:
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            best = self._min(best, self._best[node])
+        return best
+
+
+class ReasoningIndex:
+    """Precomputed lookups for reasoning rules, keyed on lowercase UI_Category.
+
+    Precedence matches a linear scan: exact match, then partial match
+    (category contains the rule's UI_Category or vice versa), then keyword
+    match; within each tier the earliest rule in the CSV wins.
+    """
+
+    def __init__(self, rules: list):
+        self.rules = rules
+        categories = [rule.get("UI_Category", "").lower() for rule in rules]
+
+        self._exact = {}
+        for pos, ui_cat in enumerate(categories):
+            self._exact.setdefault(ui_cat, pos)
+
+        # ui_cat in category: automaton over all categories
+        self._contained = SubstringMatcher({ui_cat: pos for pos, ui_cat in reversed(list(enumerate(categories)))})
+
+        # category in ui_cat: one find() over all categories joined by a separator
+        self._joined = "\0".join(categories)
+        self._starts = []
+        offset = 0
+        for ui_cat in categories:
+            self._starts.append(offset)
+            offset += len(ui_cat) + 1
+
+        keywords = {}
+        for pos, ui_cat in enumerate(categories):
+            for kw in ui_cat.replace("/", " ").replace("-", " ").split():
+                keywords.setdefault(kw, pos)
+        self._keywords = SubstringMatcher(keywords)
+
+    def find(self, category: str) -> dict:
+        """Return the best matching rule for a category, or {}."""
+        if not self.rules:
+            return {}
+        category_lower = category.lower()
+
+        pos = self._exact.get(category_lower)
+        if pos is not None:
+            return self.rules[pos]
+
+        pos = self._contained.first_match(category_lower)
+        if "\0" not in category_lower:
+            hit = self._joined.find(category_lower)
+            if hit >= 0:
+                containing = bisect_right(self._starts, hit) - 1
+                pos = containing if pos is None else min(pos, containing)
+        if pos is not None:
+            return self.rules[pos]
+
+        pos = self._keywords.first_match(category_lower)
+        return self.rules[pos] if pos is not None else {}
+
 
 # ============ DESIGN SYSTEM GENERATOR ============
 class DesignSystemGenerator:
@@ -33,6 +151,7 @@ class DesignSystemGenerator:
 
     def __init__(self):
         self.reasoning_data = self._load_reasoning()
+        self.reasoning_index = ReasoningIndex(self.reasoning_data)
 
     def _load_reasoning(self) -> list:
         """Load reasoning rules from CSV."""
@@ -42,42 +161,29 @@ class DesignSystemGenerator:
         with open(filepath, 'r', encoding='utf-8') as f:
             return list(csv.DictReader(f))
 
-    def _multi_domain_search(self, query: str, style_priority: list = None) -> dict:
-        """Execute searches across multiple domains."""
-        results = {}
+    def _multi_domain_search(self, query: str, style_priority: list = None, skip: tuple = (), cache: bool = True) -> dict:
+        """Execute searches across multiple domains.
+
+        The searches run one after another: each takes well under a
+        millisecond on a warm index and holds the GIL, so a thread pool only
+        adds its own overhead.
+        """
+        jobs = {}
         for domain, config in SEARCH_CONFIG.items():
+            if domain in skip:
+                continue
             if domain == "style" and style_priority:
                 # For style, also search with priority keywords
                 priority_query = " ".join(style_priority[:2]) if style_priority else query
-                combined_query = f"{query} {priority_query}"
-                results[domain] = search(combined_query, domain, config["max_results"])
+                jobs[domain] = (f"{query} {priority_query}", config["max_results"])
             else:
-                results[domain] = search(query, domain, config["max_results"])
-        return results
+                jobs[domain] = (query, config["max_results"])
+
+        return {domain: search(q, domain, n, None, cache) for domain, (q, n) in jobs.items()}
 
     def _find_reasoning_rule(self, category: str) -> dict:
         """Find matching reasoning rule for a category."""
-        category_lower = category.lower()
-
-        # Try exact match first
-        for rule in self.reasoning_data:
-            if rule.get("UI_Category", "").lower() == category_lower:
-                return rule
-
-        # Try partial match
-        for rule in self.reasoning_data:
-            ui_cat = rule.get("UI_Category", "").lower()
-            if ui_cat in category_lower or category_lower in ui_cat:
-                return rule
-
-        # Try keyword match
-        for rule in self.reasoning_data:
-            ui_cat = rule.get("UI_Category", "").lower()
-            keywords = ui_cat.replace("/", " ").replace("-", " ").split()
-            if any(kw in category_lower for kw in keywords):
-                return rule
-
-        return {}
+        return self.reasoning_index.find(category)
 
     def _apply_reasoning(self, category: str, search_results: dict) -> dict:
         """Apply reasoning rules to search results."""
@@ -154,10 +260,10 @@ class DesignSystemGenerator:
         """Extract results list from search result dict."""
         return search_result.get("results", [])
 
-    def generate(self, query: str, project_name: str = None) -> dict:
-        """Generate complete design system recommendation."""
+    def generate(self, query: str, project_name: str = None, cache: bool = True) -> dict:
+        """Generate complete design system recommendation (cache=False bypasses the result cache)."""
         # Step 1: First search product to get category
-        product_result = search(query, "product", 1)
+        product_result = search(query, "product", SEARCH_CONFIG["product"]["max_results"], cache=cache)
         product_results = product_result.get("results", [])
         category = "General"
         if product_results:
@@ -167,8 +273,8 @@ class DesignSystemGenerator:
         reasoning = self._apply_reasoning(category, {})
         style_priority = reasoning.get("style_priority", [])
 
-        # Step 3: Multi-domain search with style priority hints
-        search_results = self._multi_domain_search(query, style_priority)
+        # Step 3: Multi-domain search with style priority hints (product already done)
+        search_results = self._multi_domain_search(query, style_priority, skip=("product",), cache=cache)
         search_results["product"] = product_result  # Reuse product search
 
         # Step 4: Select best matches from each domain using priority
@@ -452,24 +558,70 @@ def format_markdown(design_system: dict) -> str:
 
 
 # ============ MAIN ENTRY POINT ============
-def generate_design_system(query: str, project_name: str = None, output_format: str = "ascii") -> str:
+def _file_version(filepath: Path) -> tuple:
+    """(mtime_ns, size) of a data file, or None if it is missing."""
+    try:
+        stat = filepath.stat()
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _data_versions() -> tuple:
+    """Versions of every data file a design system is derived from."""
+    files = [REASONING_FILE] + [CSV_CONFIG[domain]["file"] for domain in SEARCH_CONFIG]
+    versions = tuple(_file_version(DATA_DIR / name) for name in files)
+    # Fuzzy matching consults every domain and stack CSV (see core.known_term)
+    return versions + (data_stamps(),) if FUZZY_MATCHING else versions
+
+
+@lru_cache(maxsize=1)
+def _get_generator(reasoning_version: tuple) -> DesignSystemGenerator:
+    """Process-wide generator, rebuilt only when ui-reasoning.csv changes."""
+    return DesignSystemGenerator()
+
+
+@lru_cache(maxsize=RESULT_CACHE_SIZE)
+def _generate_cached(query: str, project_name: str, output_format: str, data_versions: tuple):
+    return _generate(query, project_name, output_format, data_versions)
+
+
+def _generate(query: str, project_name: str, output_format: str, data_versions: tuple, cache: bool = True):
+    design_system = _get_generator(data_versions[0]).generate(query, project_name, cache)
+
+    if output_format == "json":
+        return design_system
+    if output_format == "markdown":
+        return format_markdown(design_system)
+    return format_ascii_box(design_system)
+
+
+def design_system_cache_info():
+    """Hit/miss/size counters of the design system result cache."""
+    return _generate_cached.cache_info()
+
+
+def generate_design_system(query: str, project_name: str = None, output_format: str = "ascii", cache: bool = True):
     """
     Main entry point for design system generation.
 
+    Results are memoized per (query, project_name, output_format) and the
+    current versions of the underlying data files, so editing a CSV
+    invalidates them.
+
     Args:
         query: Search query (e.g., "SaaS dashboard", "e-commerce luxury")
         project_name: Optional project name for output header
-        output_format: "ascii" (default) or "markdown"
+        output_format: "ascii" (default), "markdown" or "json"
+        cache: False skips both the memo and core's persistent result cache
 
     Returns:
-        Formatted design system string
+        Formatted design system string, or for "json" the design system dict
+        (shared with the cache: do not modify it)
     """
-    generator = DesignSystemGenerator()
-    design_system = generator.generate(query, project_name)
-
-    if output_format == "markdown":
-        return format_markdown(design_system)
-    return format_ascii_box(design_system)
+    if not cache:
+        return _generate(query, project_name, output_format, _data_versions(), cache=False)
+    return _generate_cached(query, project_name, output_format, _data_versions())
 
 
 # ============ CLI SUPPORT ============
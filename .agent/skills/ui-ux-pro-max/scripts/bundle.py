@@ -0,0 +1,508 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Data Bundle - every data CSV and its BM25 index compiled into
+one binary file that is opened with mmap, so a cold start parses nothing.
+
+Usage:
+    python bundle.py            # (re)build the bundle if any CSV changed
+    python bundle.py --force    # always rebuild this copy's sections
+
+core.load_index() uses the bundle automatically and rebuilds it when a CSV
+is newer than its compiled section.
+
+The bundle is content-addressed: sections are keyed by the CSV's sha256
+and search columns, and a source table maps each CSV path to the hash of
+its contents. Copies of the skill whose data dirs share the index store
+(.agent/skills and .agent/.shared) therefore share one section per
+distinct CSV, and a rebuild by one copy carries over the sections the
+other copy's sources still use, byte for byte.
+
+Layout (native byte order; arrays 8-byte aligned):
+    header     MAGIC, format version, source count, directory offset/length
+    stamps     per source: CSV (mtime_ns, size), patchable in place
+    directory  JSON: tokenizer signature; per source path and sha256; per
+               section sha256, search_cols, columns, BM25 parameters and
+               the offset/count of each array below; per data dir the
+               source path of each of its CSVs and the offset/count of its
+               vocabulary arrays
+    sections   string table (offsets + utf-8 data), cell -> string ids,
+               doc lengths, sorted vocabulary, idf, postings (docs, tfs),
+               for field (BM25F) indexes, per-field doc lengths and
+               per-field posting tfs (row-major, `fields` values per entry),
+               and the row bitmaps of every facet value of low-cardinality
+               columns (ceil(rows / 8) little-endian bytes each, in the
+               order of the directory's column -> values lists)
+    vocabularies  per data dir, the sorted union of its sections' terms
+               (core.known_term answers from it without loading any index)
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+
+from core import BM25, facet_bitmaps
+
+
+# ============ CONFIGURATION ============
+MAGIC = b"UIPXBNDL"
+HEADER = struct.Struct("=8sIIQQ")  # magic, version, n_sections, dir_offset, dir_length
+STAMP = struct.Struct("=qq")  # mtime_ns, size
+ALIGN = 8
+
+# Array typecodes; the bundle is only read back on a matching platform
+U32, F64 = "I", "d"
+if array(U32).itemsize != 4:
+    U32 = "L"
+
+# Typecode of every section array
+ARRAYS = {
+    "str_offsets": U32, "str_data": "B", "cells": U32,
+    "doc_lengths": U32, "term_offsets": U32, "term_data": "B", "idf": F64,
+    "post_offsets": U32, "post_docs": U32, "post_tfs": U32,
+    "field_lengths": U32, "post_field_tfs": U32, "facet_bits": "B",
+}
+
+# Only columns whose values repeat (at most FACET_MAX_VALUES distinct ones,
+# and no more than half the rows) get stored facets; filters on free text
+# columns build theirs on first use instead
+FACET_MAX_VALUES = 64
+
+
+# ============ WRITER ============
+def _align(buf):
+    buf.extend(b"\0" * (-len(buf) % ALIGN))
+
+
+def _put(buf, arrays, name, values):
+    """Append an array to buf and record its (offset, count)"""
+    _align(buf)
+    data = array(ARRAYS[name], values)
+    arrays[name] = (len(buf), len(data))
+    buf.extend(data.tobytes())
+
+
+def _copy_entry(buf, bundle, entry):
+    """Append the arrays of a section or vocabulary directory entry of an
+    open bundle to buf unchanged, returning the entry relocated"""
+    arrays = {}
+    for name, (offset, count) in entry["arrays"].items():
+        _align(buf)
+        arrays[name] = (len(buf), count)
+        buf.extend(bundle._view(offset, count, name).cast("B"))
+    return dict(entry, arrays=arrays)
+
+
+def _compile_section(buf, meta, rows, bm25):
+    """Append one CSV's rows and BM25 index to buf, returning its directory entry"""
+    arrays = {}
+
+    # String table: each distinct cell value stored once
+    string_ids, strings, cells, nulls = {}, [], [], []
+    for r, row in enumerate(rows.rows):
+        for c, value in enumerate(row):
+            if value is None:
+                nulls.append(r * len(rows.columns) + c)
+                value = ""
+            sid = string_ids.get(value)
+            if sid is None:
+                sid = string_ids[value] = len(strings)
+                strings.append(value.encode("utf-8"))
+            cells.append(sid)
+    _put(buf, arrays, "str_offsets", _offsets(strings))
+    _put(buf, arrays, "str_data", b"".join(strings))
+    _put(buf, arrays, "cells", cells)
+
+    # Vocabulary sorted by utf-8 bytes (== code point order) for binary search
+    terms = sorted(bm25.idf, key=lambda t: t.encode("utf-8"))
+    encoded = [t.encode("utf-8") for t in terms]
+    _put(buf, arrays, "doc_lengths", bm25.doc_lengths)
+    _put(buf, arrays, "term_offsets", _offsets(encoded))
+    _put(buf, arrays, "term_data", b"".join(encoded))
+    _put(buf, arrays, "idf", [bm25.idf[t] for t in terms])
+
+    docs, tfs, post_offsets = [], [], [0]
+    for term in terms:
+        _, term_docs, term_tfs = bm25._postings(term)
+        docs.extend(term_docs)
+        tfs.extend(term_tfs)
+        post_offsets.append(len(docs))
+    _put(buf, arrays, "post_offsets", post_offsets)
+    _put(buf, arrays, "post_docs", docs)
+    _put(buf, arrays, "post_tfs", tfs)
+
+    if bm25.fields:
+        _put(buf, arrays, "field_lengths", (n for lengths in bm25._field_length_rows() for n in lengths))
+        _put(buf, arrays, "post_field_tfs",
+             (tf for term in terms for field_tfs in bm25._field_postings(term)[2] for tf in field_tfs))
+
+    # Facets: row bitmaps of each value of the repeating columns
+    facets, bits = {}, []
+    size = (len(rows) + 7) // 8
+    for col in dict.fromkeys(rows.columns):
+        values = [rows.get(idx, col) for idx in range(len(rows))]
+        if len(set(values)) <= min(FACET_MAX_VALUES, len(rows) // 2):
+            facet = facet_bitmaps(values, len(rows))
+            facets[col] = list(facet)
+            bits.extend(bitmap.to_bytes(size, "little") for bitmap in facet.values())
+    _put(buf, arrays, "facet_bits", b"".join(bits))
+
+    return dict(meta, columns=list(rows.columns), rows=len(rows), nulls=nulls,
+                N=bm25.N, avgdl=bm25.avgdl, k1=bm25.k1, b=bm25.b,
+                fields=bm25.fields, avg_field_lengths=list(bm25.avg_field_lengths),
+                facets=facets, arrays=arrays)
+
+
+def _compile_vocabulary(buf, data_dir, files, terms):
+    """Append the sorted union vocabulary of a data dir to buf, returning its directory entry"""
+    arrays = {}
+    encoded = sorted({t.encode("utf-8") for t in terms})
+    _put(buf, arrays, "term_offsets", _offsets(encoded))
+    _put(buf, arrays, "term_data", b"".join(encoded))
+    return {"data_dir": data_dir, "files": files, "arrays": arrays}
+
+
+def _offsets(chunks):
+    offsets = [0]
+    for chunk in chunks:
+        offsets.append(offsets[-1] + len(chunk))
+    return offsets
+
+
+def write_bundle(path, sources, sections, version, tokenizer, vocabularies=()):
+    """Write a bundle to path atomically.
+
+    sources are (CSV path, sha256, (mtime_ns, size)) triples. sections are
+    either (meta, rows, bm25) to compile, meta being a JSON-able dict with
+    the section's sha256 and search_cols, or (bundle, i) to copy section i
+    of an open bundle. vocabularies are either (data dir, {relative file:
+    CSV path}, terms) to compile or (bundle, data dir) to copy. tokenizer
+    is the signature of the tokenizer the indexes were built with.
+    """
+    body = bytearray()
+    directory = []
+    for section in sections:
+        if len(section) == 2:
+            directory.append(_copy_entry(body, section[0], section[0].sections[section[1]]))
+        else:
+            directory.append(_compile_section(body, *section))
+    vocabulary_entries = []
+    for vocabulary in vocabularies:
+        if len(vocabulary) == 2:
+            bundle, data_dir = vocabulary
+            vocabulary_entries.append(_copy_entry(body, bundle, bundle.vocabularies[data_dir]))
+        else:
+            vocabulary_entries.append(_compile_vocabulary(body, *vocabulary))
+
+    # Offsets recorded while compiling are relative to the body start
+    body_start = HEADER.size + STAMP.size * len(sources)
+    body_start += -body_start % ALIGN
+    for entry in directory + vocabulary_entries:
+        entry["arrays"] = {k: (body_start + off, n) for k, (off, n) in entry["arrays"].items()}
+    dir_bytes = json.dumps({
+        "byteorder": sys.byteorder,
+        "tokenizer": tokenizer,
+        "sources": [{"path": source, "sha256": sha256} for source, sha256, _ in sources],
+        "sections": directory,
+        "vocabularies": vocabulary_entries,
+    }).encode("utf-8")
+
+    out = bytearray(HEADER.pack(MAGIC, version, len(sources), body_start + len(body), len(dir_bytes)))
+    for _, _, stamp in sources:
+        out.extend(STAMP.pack(*stamp))
+    out.extend(b"\0" * (body_start - len(out)))
+    out.extend(body)
+    out.extend(dir_bytes)
+
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp, "wb") as f:
+            f.write(out)
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+
+# ============ READER ============
+class Bundle:
+    """A memory-mapped bundle; sources are looked up by CSV path, sections by
+    (sha256, search_cols), vocabularies by data dir"""
+
+    def __init__(self, path, version, tokenizer):
+        self.path = path
+        with open(path, "rb") as f:
+            self.stat = os.fstat(f.fileno())
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, file_version, count, dir_offset, dir_length = HEADER.unpack_from(self._mm, 0)
+            directory = json.loads(self._mm[dir_offset:dir_offset + dir_length]) if magic == MAGIC else None
+        except (struct.error, ValueError):
+            directory = None
+        if (directory is None or file_version != version or directory.get("byteorder") != sys.byteorder
+                or directory.get("tokenizer") != tokenizer or len(directory.get("sources", ())) != count):
+            raise ValueError(f"Incompatible or corrupt bundle: {path}")
+
+        self._buffer = memoryview(self._mm)
+        self.sources = directory["sources"]
+        self.sections = directory["sections"]
+        self._by_path = {s["path"]: i for i, s in enumerate(self.sources)}
+        self._by_content = {(s["sha256"], tuple(s["search_cols"])): i for i, s in enumerate(self.sections)}
+        self.vocabularies = {v["data_dir"]: v for v in directory.get("vocabularies", ())}
+
+    def source(self, path):
+        """Source number of a CSV path, or None"""
+        return self._by_path.get(path)
+
+    def section(self, sha256, search_cols):
+        """Section number for CSV content indexed over search_cols, or None"""
+        return self._by_content.get((sha256, tuple(search_cols)))
+
+    def stamp(self, i):
+        """(mtime_ns, size) recorded for source i"""
+        return STAMP.unpack_from(self._mm, HEADER.size + STAMP.size * i)
+
+    def restamp(self, i, stamp):
+        """Record a new CSV mtime for an unchanged source (content verified)"""
+        with open(self.path, "r+b") as f:
+            f.seek(HEADER.size + STAMP.size * i)
+            f.write(STAMP.pack(*stamp))
+
+    def array(self, i, name):
+        """Zero-copy view of one of section i's arrays"""
+        return self._view(*self.sections[i]["arrays"][name], name)
+
+    def vocabulary(self, data_dir):
+        """MappedVocabulary of a data dir, or None"""
+        entry = self.vocabularies.get(data_dir)
+        return None if entry is None else MappedVocabulary(self, entry)
+
+    def _view(self, offset, count, name):
+        typecode = ARRAYS[name]
+        return self._buffer[offset:offset + count * array(typecode).itemsize].cast(typecode)
+
+
+class MappedRowStore:
+    """RowStore interface over a bundle section; cells decode on access"""
+
+    def __init__(self, bundle, i):
+        meta = bundle.sections[i]
+        self.columns = tuple(sys.intern(col) for col in meta["columns"])
+        self._col_index = {col: pos for pos, col in enumerate(self.columns)}
+        self._rows = meta["rows"]
+        self._nulls = frozenset(meta["nulls"])
+        self._cells = bundle.array(i, "cells")
+        self._str_offsets = bundle.array(i, "str_offsets")
+        self._str_data = bundle.array(i, "str_data")
+        self._facet_bits = bundle.array(i, "facet_bits")
+        self._stored_facets, start = {}, 0
+        for col, values in meta["facets"].items():
+            self._stored_facets[col] = (start, values)
+            start += len(values)
+        self._facets = {}
+
+    def __len__(self):
+        return self._rows
+
+    def _string(self, sid):
+        return str(self._str_data[self._str_offsets[sid]:self._str_offsets[sid + 1]], "utf-8")
+
+    def _cell(self, idx, pos):
+        cell = idx * len(self.columns) + pos
+        if cell in self._nulls:
+            return None
+        return self._string(self._cells[cell])
+
+    def get(self, idx, col, default=""):
+        """Value of one cell, or default if the column does not exist"""
+        pos = self._col_index.get(col)
+        return default if pos is None else self._cell(idx, pos)
+
+    def project(self, idx, cols):
+        """Materialize row idx as a dict restricted to existing cols"""
+        return {col: self._cell(idx, self._col_index[col]) for col in cols if col in self._col_index}
+
+    def facet(self, col):
+        """RowStore.facet, read from the section's stored bitmaps when it has
+        them, else built with each distinct cell string decoded once"""
+        facet = self._facets.get(col)
+        if facet is None and col in self._stored_facets:
+            start, values = self._stored_facets[col]
+            size = (self._rows + 7) // 8
+            facet = self._facets[col] = {
+                value: int.from_bytes(self._facet_bits[(start + k) * size:(start + k + 1) * size], "little")
+                for k, value in enumerate(values)}
+        elif facet is None and col in self._col_index:
+            width, pos = len(self.columns), self._col_index[col]
+            cells = self._cells[pos::width].tolist()
+            strings = {sid: self._string(sid) for sid in set(cells)}
+            values = (None if idx * width + pos in self._nulls else strings[sid] for idx, sid in enumerate(cells))
+            facet = self._facets[col] = facet_bitmaps(values, self._rows)
+        return facet
+
+    def __getitem__(self, idx):
+        return self.project(idx, self.columns)
+
+
+class MappedBM25(BM25):
+    """BM25 scorer reading postings straight from a bundle section"""
+
+    def __init__(self, bundle, i):
+        meta = bundle.sections[i]
+        super().__init__(meta["k1"], meta["b"])
+        self.N = meta["N"]
+        self.avgdl = meta["avgdl"]
+        self.doc_lengths = bundle.array(i, "doc_lengths")
+        self._idf = bundle.array(i, "idf")
+        self._term_offsets = bundle.array(i, "term_offsets")
+        self._term_data = bundle.array(i, "term_data")
+        self._post_offsets = bundle.array(i, "post_offsets")
+        self._post_docs = bundle.array(i, "post_docs")
+        self._post_tfs = bundle.array(i, "post_tfs")
+        self.fields = meta["fields"]
+        if self.fields:
+            self.avg_field_lengths = tuple(meta["avg_field_lengths"])
+            self._field_lengths = bundle.array(i, "field_lengths")
+            self._post_field_tfs = bundle.array(i, "post_field_tfs")
+
+    def _term(self, t):
+        return self._term_data[self._term_offsets[t]:self._term_offsets[t + 1]].tobytes()
+
+    def _term_id(self, token):
+        """Binary search of the sorted vocabulary"""
+        key = token.encode("utf-8")
+        terms = _TermView(self)
+        t = bisect_left(terms, key)
+        return t if t < len(terms) and terms[t] == key else None
+
+    def _term_idf(self, token):
+        t = self._term_id(token)
+        return None if t is None else self._idf[t]
+
+    def _terms(self):
+        return (str(term, "utf-8") for term in _TermView(self))
+
+    def thaw(self, doc_hashes):
+        """Equivalent in-memory BM25 (e.g. to apply BM25.updated), rebuilt
+        from the postings; doc_hashes are those of the indexed documents"""
+        bm25 = BM25(self.k1, self.b)
+        bm25.N, bm25.avgdl = self.N, self.avgdl
+        bm25.doc_lengths = list(self.doc_lengths)
+        bm25.doc_hashes = doc_hashes
+        bm25.term_freqs = [{} for _ in range(self.N)]
+        bm25.fields, bm25.avg_field_lengths = self.fields, self.avg_field_lengths
+        if self.fields:
+            bm25.field_lengths = list(self._field_length_rows())
+            bm25.field_freqs = [{} for _ in range(self.N)]
+        for t, term in enumerate(self._terms()):
+            lo, hi = self._post_offsets[t], self._post_offsets[t + 1]
+            docs = self._post_docs[lo:hi].tolist()
+            for idx, tf in zip(docs, self._post_tfs[lo:hi]):
+                bm25.term_freqs[idx][term] = tf
+            if self.fields:
+                flat = self._post_field_tfs[lo * self.fields:hi * self.fields].tolist()
+                for idx, field_tfs in zip(docs, zip(*[iter(flat)] * self.fields)):
+                    bm25.field_freqs[idx][term] = field_tfs
+            bm25.postings[term] = docs
+            bm25.doc_freqs[term] = len(docs)
+            bm25.idf[term] = self._idf[t]
+        return bm25
+
+    def _postings(self, token):
+        t = self._term_id(token)
+        if t is None:
+            return None
+        lo, hi = self._post_offsets[t], self._post_offsets[t + 1]
+        return self._idf[t], self._post_docs[lo:hi], self._post_tfs[lo:hi]
+
+    def _field_postings(self, token):
+        t = self._term_id(token)
+        if t is None:
+            return None
+        lo, hi = self._post_offsets[t], self._post_offsets[t + 1]
+        return self._idf[t], self._post_docs[lo:hi], _FieldTfs(self._post_field_tfs, lo, hi, self.fields)
+
+    def _field_length_rows(self):
+        flat = self._field_lengths.tolist()
+        return zip(*[iter(flat)] * self.fields)
+
+    def _csr(self):
+        import numpy as np
+        indptr = np.frombuffer(self._post_offsets, dtype=np.uint32).astype(np.int64)
+        docs = np.frombuffer(self._post_docs, dtype=np.uint32).astype(np.int64)
+        tf = np.frombuffer(self._post_tfs, dtype=np.uint32)
+        idf = np.frombuffer(self._idf, dtype=np.float64)
+        return self._term_id, indptr, docs, tf, idf
+
+    def _csr_fields(self):
+        import numpy as np
+        return np.frombuffer(self._post_field_tfs, dtype=np.uint32).reshape(-1, self.fields)
+
+
+class MappedVocabulary:
+    """A data dir's union vocabulary; files maps each of its CSVs (relative
+    to the data dir) to the source path whose stamp it was built from"""
+
+    def __init__(self, bundle, entry):
+        self.files = entry["files"]
+        self._term_offsets = bundle._view(*entry["arrays"]["term_offsets"], "term_offsets")
+        self._term_data = bundle._view(*entry["arrays"]["term_data"], "term_data")
+
+    def _term(self, t):
+        return self._term_data[self._term_offsets[t]:self._term_offsets[t + 1]].tobytes()
+
+    def __contains__(self, token):
+        key = token.encode("utf-8")
+        terms = _TermView(self)
+        t = bisect_left(terms, key)
+        return t < len(terms) and terms[t] == key
+
+
+class _TermView:
+    """Sequence of a MappedBM25's or MappedVocabulary's terms as bytes, for bisect"""
+
+    def __init__(self, owner):
+        self._owner = owner
+
+    def __len__(self):
+        return len(self._owner._term_offsets) - 1
+
+    def __getitem__(self, t):
+        return self._owner._term(t)
+
+
+class _FieldTfs:
+    """Sequence of a posting list's per-field term frequency tuples, read
+    from the bundle on access"""
+
+    def __init__(self, flat, lo, hi, fields):
+        self._flat, self._lo, self._hi, self._fields = flat, lo, hi, fields
+
+    def __len__(self):
+        return self._hi - self._lo
+
+    def __getitem__(self, i):
+        start = (self._lo + i) * self._fields
+        return tuple(self._flat[start:start + self._fields])
+
+    def __iter__(self):
+        flat = self._flat[self._lo * self._fields:self._hi * self._fields].tolist()
+        return zip(*[iter(flat)] * self._fields)
+
+
+# ============ CLI SUPPORT ============
+if __name__ == "__main__":
+    import argparse
+    from core import build_bundle
+
+    parser = argparse.ArgumentParser(description="Compile UI Pro Max data into a binary bundle")
+    parser.add_argument("--force", action="store_true", help="Rebuild even if every section is current")
+    args = parser.parse_args()
+
+    path = build_bundle(force=args.force)
+    print(f"Bundle: {path}" if path else "Bundle could not be written (read-only index dir?)")
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Ranking Evaluation - nDCG and MRR of search() / search_stack()
+against labeled relevance judgments, reported next to query latency.
+
+Usage:
+    python evaluate.py                           # table per domain/stack
+    python evaluate.py --json -o quality.json    # machine-readable report
+    python evaluate.py --baseline quality.json   # exit 1 if quality dropped
+
+judgments.json lists queries with graded relevant rows, identified by the
+value of each domain's key column ("key_cols"). Gains are 2^grade - 1 with
+a log2 rank discount; a key counts at its first position only. MRR uses
+the first result with any grade. A judgment without relevant rows expects
+no results at all (a query outside the domain): it scores 1 only if none
+come back. Judgments report under their domain (or stack), or under their
+"group" when given, e.g. misspelled and partial words ("fuzzy") and
+out-of-domain queries ("no-match"), the two sides of fuzzy matching.
+"""
+
+import argparse
+import json
+import sys
+import time
+from collections import defaultdict
+from math import log2
+from pathlib import Path
+
+from core import search, search_stack
+
+JUDGMENTS_FILE = Path(__file__).parent / "judgments.json"
+REPEAT = 5
+TOLERANCE = 0.005
+
+
+# ============ METRICS ============
+def dcg(grades):
+    return sum((2 ** grade - 1) / log2(rank + 2) for rank, grade in enumerate(grades))
+
+
+def ndcg(ranked_keys, relevant, k):
+    """nDCG@k of a ranked list of row keys against {key: grade}"""
+    seen, grades = set(), []
+    for key in ranked_keys[:k]:
+        grades.append(relevant.get(key, 0) if key not in seen else 0)
+        seen.add(key)
+    ideal = dcg(sorted(relevant.values(), reverse=True)[:k])
+    return dcg(grades) / ideal if ideal else 0.0
+
+
+def reciprocal_rank(ranked_keys, relevant, k):
+    for rank, key in enumerate(ranked_keys[:k], 1):
+        if relevant.get(key, 0) > 0:
+            return 1.0 / rank
+    return 0.0
+
+
+# ============ EVALUATION ============
+def _run(judgment, k):
+    """(result, best-of-REPEAT latency in seconds) for one judgment"""
+    # Uncached: judge and time the ranking itself, not the result cache
+    if judgment["domain"] == "stack":
+        call = lambda: search_stack(judgment["query"], judgment["stack"], k, cache=False)
+    else:
+        call = lambda: search(judgment["query"], judgment["domain"], k, cache=False)
+    result = call()  # untimed: loads the index
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        call()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def evaluate(judgments_file=JUDGMENTS_FILE):
+    """Per-group and overall mean nDCG@k, MRR and latency (ms)"""
+    spec = json.loads(Path(judgments_file).read_text(encoding="utf-8"))
+    k = spec["k"]
+    per_group = defaultdict(list)
+    misses = []
+
+    for judgment in spec["judgments"]:
+        result, latency = _run(judgment, k)
+        key_col = spec["key_cols"][judgment["domain"]]
+        ranked = [row.get(key_col) for row in result.get("results", [])]
+        if judgment["relevant"]:
+            scores = (ndcg(ranked, judgment["relevant"], k), reciprocal_rank(ranked, judgment["relevant"], k), latency)
+        else:
+            scores = (float(not ranked), float(not ranked), latency)
+        target = f"stack:{judgment['stack']}" if judgment["domain"] == "stack" else judgment["domain"]
+        group = judgment.get("group", target)
+        per_group[group].append(scores)
+        if scores[1] == 0.0:
+            found = f" (expected none, got {len(ranked)})" if not judgment["relevant"] else ""
+            misses.append(f"{group}: {target}: {judgment['query']}{found}")
+
+    def summary(rows):
+        return {
+            "queries": len(rows),
+            "ndcg": round(sum(r[0] for r in rows) / len(rows), 4),
+            "mrr": round(sum(r[1] for r in rows) / len(rows), 4),
+            "latency_ms": round(sum(r[2] for r in rows) / len(rows) * 1000, 3),
+        }
+
+    all_rows = [row for rows in per_group.values() for row in rows]
+    return {
+        "k": k,
+        "overall": summary(all_rows),
+        "groups": {group: summary(rows) for group, rows in sorted(per_group.items())},
+        "misses": misses,
+    }
+
+
+def regressions(baseline, report, tolerance=TOLERANCE):
+    """Groups whose nDCG or MRR fell more than tolerance below the baseline"""
+    found = []
+    for group, before in dict(baseline["groups"], overall=baseline["overall"]).items():
+        after = report["overall"] if group == "overall" else report["groups"].get(group)
+        for metric in ("ndcg", "mrr"):
+            if after is not None and after[metric] < before[metric] - tolerance:
+                found.append(f"{group} {metric}: {before[metric]:.4f} -> {after[metric]:.4f}")
+    return found
+
+
+def format_table(report):
+    lines = [f"{'group':22} {'n':>3} {'nDCG@' + str(report['k']):>8} {'MRR':>7} {'ms':>8}"]
+    for group, s in list(report["groups"].items()) + [("overall", report["overall"])]:
+        lines.append(f"{group:22} {s['queries']:>3} {s['ndcg']:>8.4f} {s['mrr']:>7.4f} {s['latency_ms']:>8.3f}")
+    if report["misses"]:
+        lines.append("\nNo relevant result in top k (or results where none were expected):")
+        lines.extend(f"  {miss}" for miss in report["misses"])
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluate UI Pro Max ranking quality")
+    parser.add_argument("--judgments", type=Path, default=JUDGMENTS_FILE, help="Relevance judgments file")
+    parser.add_argument("--json", action="store_true", help="Output the report as JSON")
+    parser.add_argument("--output", "-o", type=Path, help="Also write the JSON report here")
+    parser.add_argument("--baseline", type=Path, help="Earlier JSON report; exit 1 on any nDCG/MRR drop")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help=f"Allowed drop before failing (default: {TOLERANCE})")
+    args = parser.parse_args()
+
+    report = evaluate(args.judgments)
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        args.output.write_text(text + "\n", encoding="utf-8")
+    print(text if args.json else format_table(report))
+
+    if args.baseline:
+        found = regressions(json.loads(args.baseline.read_text(encoding="utf-8")), report, args.tolerance)
+        for line in found:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        sys.exit(1 if found else 0)
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Result Cache - finished search results persisted in SQLite, so
+a query repeated in a later session is answered without loading or ranking
+any index.
+
+core builds the keys (normalized query tokens, domain/stack, options and
+the version of the data and index format); this module only stores JSON
+results under them. Entries expire after a TTL and the least recently used
+ones are evicted beyond a size bound. The database is shared by every
+process using the same index dir (WAL mode).
+
+Lookups mostly only read: recency updates and hit/miss counters are queued
+in memory and written with the next insert, by the lookup that queues the
+FLUSH_EVERYth one or comes FLUSH_INTERVAL seconds after the last write, and
+at exit. Recently seen entries are also kept in memory, so a long-running
+process (the search daemon) answers repeats without touching the database.
+A busy or locked database (another process writing for longer than
+BUSY_TIMEOUT) skips that write, or makes that lookup a miss, and further
+writes wait FLUSH_INTERVAL; queued bookkeeping is kept for the next one. Any
+other SQLite error, e.g. a read-only or corrupt file, disables the cache for
+the process: searches then simply run uncached.
+"""
+
+import atexit
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+SCHEMA = """
+PRAGMA journal_mode = WAL;
+PRAGMA synchronous = NORMAL;
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    created REAL NOT NULL,
+    used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_used ON results (used);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+COUNTERS = ("hits", "misses", "expired", "evicted")
+BUSY_TIMEOUT = 2.0
+BUSY_CODES = (5, 6)  # SQLITE_BUSY, SQLITE_LOCKED
+MEMORY_ENTRIES = 256
+FLUSH_EVERY = 64
+FLUSH_INTERVAL = 5.0
+
+
+def _busy(error):
+    """Whether a database error only means another connection holds a lock"""
+    code = getattr(error, "sqlite_errorcode", None)  # Python 3.11+
+    if code is not None:
+        return code & 0xFF in BUSY_CODES
+    return isinstance(error, sqlite3.OperationalError) and "locked" in str(error)
+
+
+class ResultCache:
+    """Persistent key -> result dict store with TTL and LRU eviction"""
+
+    def __init__(self, path, ttl, max_entries):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()  # key -> (created, JSON value)
+        self._used = {}  # key -> last use not yet written
+        self._counts = dict.fromkeys(COUNTERS, 0)
+        self._flushed = time.time()
+        self._write_after = 0.0  # writes pause until then after a busy database
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(path), timeout=BUSY_TIMEOUT, isolation_level=None,
+                                       check_same_thread=False)
+            self._db.executescript(SCHEMA)
+        except (OSError, sqlite3.Error):
+            self._db = None
+        else:
+            atexit.register(self.flush)
+
+    @property
+    def enabled(self):
+        return self._db is not None
+
+    def _remember(self, key, created, value):
+        self._memory[key] = (created, value)
+        self._memory.move_to_end(key)
+        if len(self._memory) > MEMORY_ENTRIES:
+            self._memory.popitem(last=False)
+
+    def _write(self, statements):
+        """Run (sql, params) pairs plus the queued bookkeeping in one transaction.
+
+        Returns the row counts of statements. Caller holds the lock.
+        """
+        db = self._db
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            counts = [db.execute(sql, params).rowcount for sql, params in statements]
+            db.executemany("UPDATE results SET used = MAX(used, ?) WHERE key = ?",
+                           [(used, key) for key, used in self._used.items()])
+            db.executemany("INSERT INTO counters (name, value) VALUES (?, ?) "
+                           "ON CONFLICT (name) DO UPDATE SET value = value + excluded.value",
+                           [(name, n) for name, n in self._counts.items() if n])
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+        self._used.clear()
+        self._counts = dict.fromkeys(COUNTERS, 0)
+        self._flushed = time.time()
+        return counts
+
+    def _fail(self, error):
+        """Handle a database error: back off writes if the database was busy
+        or locked, else disable the cache. Returns whether it is disabled"""
+        if _busy(error):
+            self._write_after = time.time() + FLUSH_INTERVAL
+            return False
+        self._db = None
+        self._memory.clear()
+        return True
+
+    def get(self, key):
+        """The cached result for key, or None if absent or expired"""
+        if self._db is None:
+            return None
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                try:
+                    entry = self._db.execute("SELECT created, value FROM results WHERE key = ?", (key,)).fetchone()
+                except sqlite3.Error as error:
+                    if self._fail(error):
+                        return None
+            if entry is None or entry[0] < now - self.ttl:
+                self._counts["misses"] += 1
+                entry = None
+            else:
+                self._counts["hits"] += 1
+                self._used[key] = now
+                self._remember(key, *entry)
+            if now >= self._write_after and (
+                    sum(self._counts.values()) >= FLUSH_EVERY or now - self._flushed >= FLUSH_INTERVAL):
+                try:
+                    self._write([])
+                except sqlite3.Error as error:
+                    self._fail(error)
+        return None if entry is None else json.loads(entry[1])
+
+    def put(self, key, result):
+        """Store result under key, then drop expired and least recently used entries"""
+        if self._db is None:
+            return
+        value = json.dumps(result, ensure_ascii=False, separators=(",", ":"))
+        now = time.time()
+        with self._lock:
+            # Keys embed the data version, so a remembered entry stays valid
+            # until its TTL even if evicted from (or never written to) the database
+            self._remember(key, now, value)
+            if now < self._write_after:
+                return
+            try:
+                _, expired, evicted = self._write([
+                    ("INSERT OR REPLACE INTO results (key, value, created, used) VALUES (?, ?, ?, ?)",
+                     (key, value, now, now)),
+                    ("DELETE FROM results WHERE created < ?", (now - self.ttl,)),
+                    ("DELETE FROM results WHERE key IN "
+                     "(SELECT key FROM results ORDER BY used DESC LIMIT -1 OFFSET ?)", (self.max_entries,)),
+                ])
+                self._counts["expired"] += expired
+                self._counts["evicted"] += evicted
+            except sqlite3.Error as error:
+                self._fail(error)
+
+    def flush(self):
+        """Write queued recency updates and counters"""
+        with self._lock:
+            if self._db is None or not (self._used or any(self._counts.values())):
+                return
+            try:
+                self._write([])
+            except sqlite3.Error as error:
+                self._fail(error)
+
+    def stats(self):
+        """Entry count, size on disk, hit/miss/expiry/eviction counters and settings"""
+        self.flush()
+        stats = {"enabled": self._db is not None, "path": str(self.path), "ttl": self.ttl,
+                 "max_entries": self.max_entries}
+        if self._db is None:
+            return stats
+        with self._lock:
+            try:
+                stats["entries"] = self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+                counters = dict(self._db.execute("SELECT name, value FROM counters"))
+            except sqlite3.Error:
+                return dict(stats, enabled=False)
+        stats.update((name, counters.get(name, 0)) for name in COUNTERS)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        try:
+            stats["bytes"] = sum(p.stat().st_size for p in (self.path, self.path.with_name(self.path.name + "-wal"))
+                                 if p.exists())
+        except OSError:
+            pass
+        return stats
+
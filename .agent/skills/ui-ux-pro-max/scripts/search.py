@@ -4,14 +4,57 @@
 UI/UX Pro Max Search - BM25 search engine for UI/UX style guides
 Usage: python search.py "<query>" [--domain <domain>] [--stack <stack>] [--max-results 3]
        python search.py "<query>" --design-system [-p "Project Name"]
+       python search.py --batch < queries.jsonl
+       python search.py --serve [--port 8765]
 
-Domains: style, prompt, color, chart, landing, product, ux, typography
+--batch reads one JSON query per line ({"query": ..., "domain"/"stack": ...,
+"max_results": ..., "fields": [...], "where": {...}} or a bare string) and
+writes one JSON result per line.
+
+--where "Col=Value" (repeatable) ranks only rows whose column holds that
+value, ignoring case: e.g. --where Severity=High --where Platform=Web.
+Values repeated for one column are alternatives (Platform=Web, Platform=All).
+
+--jsonl streams one compact JSON record per result row as soon as it is
+ranked ({"domain"/"stack": ..., "rank": n, <columns>}); for --design-system
+one record per section. --fields "Col A,Col B" keeps only those columns
+(design system: those sections).
+
+Queries are answered by a running --serve daemon when one is listening
+(warm indexes) and serves the same data dir, index version and tokenizer,
+otherwise in-process. Use --no-daemon to force in-process.
+
+Results are cached on disk across sessions (keyed by the normalized query,
+target and data version), so a repeated query skips the index. --no-cache
+bypasses the cache; --cache-stats prints its counters.
+
+Domains: style, prompt, color, chart, landing, product, ux, typography, all
 Stacks: html-tailwind, react, nextjs
 """
 
 import argparse
-from core import CSV_CONFIG, AVAILABLE_STACKS, MAX_RESULTS, search, search_stack
-from design_system import generate_design_system
+from client import DEFAULT_HOST, DEFAULT_PORT, query_daemon
+from core import (CSV_CONFIG, AVAILABLE_STACKS, MAX_RESULTS, cache_stats, engine_signature, request_error, search,
+                  search_many, search_stack, stream_search)
+
+# design_system (design system mode) and server (--serve) are imported only
+# by the modes that use them: every agent call pays the CLI's startup time
+
+
+def parse_where(value):
+    """One --where "Col=Value" argument as a (column, value) pair"""
+    col, sep, val = value.partition("=")
+    if not sep or not col.strip():
+        raise argparse.ArgumentTypeError(f"expected Col=Value, got {value!r}")
+    return col.strip(), val.strip()
+
+
+def where_filters(pairs):
+    """--where pairs as {column: [values]}, or None without any"""
+    where = {}
+    for col, val in pairs or ():
+        where.setdefault(col, []).append(val)
+    return where or None
 
 
 def format_output(result):
@@ -26,6 +69,8 @@ def format_output(result):
     else:
         output.append(f"## UI Pro Max Search Results")
         output.append(f"**Domain:** {result['domain']} | **Query:** {result['query']}")
+    if result.get("where"):
+        output.append("**Where:** " + ", ".join(f"{col} = {' | '.join(values)}" for col, values in result["where"].items()))
     output.append(f"**Source:** {result['file']} | **Found:** {result['count']} results\n")
 
     for i, row in enumerate(result['results'], 1):
@@ -40,27 +85,165 @@ def format_output(result):
     return "\n".join(output)
 
 
+def jsonl_records(stream):
+    """One record per result row of a stream_search()-style stream (header first)"""
+    header = next(stream)
+    if "error" in header:
+        yield header
+        return
+    source = {"stack": header["stack"]} if header.get("stack") else {"domain": header["domain"]}
+    for rank, row in enumerate(stream, 1):
+        yield {**source, "rank": rank, **row}
+
+
+def design_system_records(design_system, sections=None):
+    """One record per design system section, the scalar fields as "summary" """
+    summary = {"section": "summary"}
+    records = []
+    for key, value in design_system.items():
+        if isinstance(value, dict) and key != "decision_rules":
+            records.append({"section": key, **value})
+        else:
+            summary[key] = value
+    records.insert(0, summary)
+    return [record for record in records if not sections or record["section"] in sections]
+
+
+def run_batch(lines, execute):
+    """Parse JSONL queries, answer them with execute(queries), return JSONL lines.
+
+    A line that is not valid JSON or not a well-formed query gets its own
+    {"error": "line N: ..."} record; the other lines are still answered.
+    """
+    import json
+
+    queries, records = [], []
+    for line_no, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            query = json.loads(line)
+            error = request_error({"query": query} if isinstance(query, str) else query)
+            if error:
+                raise ValueError(error)
+        except ValueError as e:
+            records.append({"error": f"line {line_no}: {e}"})
+        else:
+            records.append(None)
+            queries.append(query)
+
+    answers = iter(execute(queries) if queries else [])
+    return [json.dumps(record or next(answers), ensure_ascii=False) for record in records]
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="UI Pro Max Search")
-    parser.add_argument("query", help="Search query")
-    parser.add_argument("--domain", "-d", choices=list(CSV_CONFIG.keys()), help="Search domain")
+    parser.add_argument("query", nargs="?", help="Search query")
+    parser.add_argument("--domain", "-d", choices=list(CSV_CONFIG.keys()) + ["all"], help="Search domain (all: blended search across every domain)")
     parser.add_argument("--stack", "-s", choices=AVAILABLE_STACKS, help="Stack-specific search (html-tailwind, react, nextjs)")
     parser.add_argument("--max-results", "-n", type=int, default=MAX_RESULTS, help="Max results (default: 3)")
     parser.add_argument("--json", action="store_true", help="Output as JSON")
+    parser.add_argument("--jsonl", action="store_true", help="Stream compact JSONL, one record per result")
+    parser.add_argument("--fields", type=lambda value: [f.strip() for f in value.split(",") if f.strip()],
+                        help="Comma-separated result columns to output (design system: sections)")
+    parser.add_argument("--where", "-w", action="append", type=parse_where, metavar="COL=VALUE",
+                        help="Only rank rows whose column has this value (repeatable; same column: any of)")
+    parser.add_argument("--batch", action="store_true", help="Read JSONL queries from stdin, write JSONL results")
     # Design system generation
     parser.add_argument("--design-system", "-ds", action="store_true", help="Generate complete design system recommendation")
     parser.add_argument("--project-name", "-p", type=str, default=None, help="Project name for design system output")
     parser.add_argument("--format", "-f", choices=["ascii", "markdown"], default="ascii", help="Output format for design system")
+    # Search daemon
+    parser.add_argument("--serve", action="store_true", help="Run the search daemon with all indexes kept warm")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"Daemon host (default: {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Daemon port (default: {DEFAULT_PORT})")
+    parser.add_argument("--no-daemon", action="store_true", help="Always search in-process, never contact the daemon")
+    # Result cache
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the persistent result cache")
+    parser.add_argument("--cache-stats", action="store_true", help="Print result cache statistics as JSON and exit")
 
     args = parser.parse_args()
 
+    if args.serve:
+        from server import serve
+        serve(args.host, args.port)
+        raise SystemExit(0)
+    if args.cache_stats:
+        import json
+        print(json.dumps(cache_stats(), indent=2))
+        raise SystemExit(0)
+    if args.query is None and not args.batch:
+        parser.error("the following arguments are required: query")
+
+    cache = not args.no_cache
+    where = where_filters(args.where)
+    engine = engine_signature()
+
+    def run(op, op_args, local):
+        """Ask the daemon first (unless disabled), else run in-process"""
+        op_args = dict(op_args, cache=cache)
+        if not args.no_daemon:
+            result = query_daemon(op, op_args, args.host, args.port, engine=engine)
+            if result is not None:
+                return result
+        return local()
+
+    def emit(record):
+        """Write one compact JSONL record right away"""
+        import json
+        try:
+            print(json.dumps(record, ensure_ascii=False, separators=(",", ":")), flush=True)
+        except BrokenPipeError:
+            # The reader stopped early (e.g. `| head`): silence the exit-time flush
+            import os
+            import sys
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+            raise SystemExit(0)
+
+    # Batch mode: one pass over all queries
+    if args.batch:
+        import sys
+
+        def execute(queries):
+            defaults = {key: value for key, value in (("fields", args.fields), ("where", where)) if value}
+            if defaults:
+                queries = [{**defaults, **({"query": q} if isinstance(q, str) else q)} for q in queries]
+            return run("search_many", {"queries": queries}, lambda: search_many(queries, cache))
+        for line in run_batch(sys.stdin, execute):
+            print(line)
     # Design system takes priority
-    if args.design_system:
-        result = generate_design_system(args.query, args.project_name, args.format)
-        print(result)
+    elif args.design_system:
+        from design_system import generate_design_system
+        output_format = "json" if args.jsonl else args.format
+        result = run("design_system", {"query": args.query, "project_name": args.project_name, "format": output_format},
+                     lambda: generate_design_system(args.query, args.project_name, output_format, cache))
+        if args.jsonl:
+            for record in design_system_records(result, args.fields):
+                emit(record)
+        else:
+            print(result)
+    # Streaming: rank locally and write each row as it is materialized
+    elif args.jsonl:
+        op_args = {"query": args.query, "max_results": args.max_results, "fields": args.fields, "where": where,
+                   "cache": cache}
+        if args.stack:
+            result = None if args.no_daemon else query_daemon("search_stack", dict(op_args, stack=args.stack), args.host,
+                                                              args.port, engine=engine)
+        else:
+            result = None if args.no_daemon else query_daemon("search", dict(op_args, domain=args.domain), args.host,
+                                                              args.port, engine=engine)
+        if result is not None:
+            stream = iter([{k: v for k, v in result.items() if k not in ("count", "results")}] + result.get("results", []))
+        else:
+            stream = stream_search(args.query, args.domain, args.stack, args.max_results, args.fields, cache, where)
+        for record in jsonl_records(stream):
+            emit(record)
     # Stack search
     elif args.stack:
-        result = search_stack(args.query, args.stack, args.max_results)
+        result = run("search_stack", {"query": args.query, "stack": args.stack, "max_results": args.max_results, "fields": args.fields,
+                                      "where": where},
+                     lambda: search_stack(args.query, args.stack, args.max_results, args.fields, cache, where))
         if args.json:
             import json
             print(json.dumps(result, indent=2, ensure_ascii=False))
@@ -68,7 +251,9 @@ if __name__ == "__main__":
             print(format_output(result))
     # Domain search
     else:
-        result = search(args.query, args.domain, args.max_results)
+        result = run("search", {"query": args.query, "domain": args.domain, "max_results": args.max_results, "fields": args.fields,
+                                "where": where},
+                     lambda: search(args.query, args.domain, args.max_results, args.fields, cache, where))
         if args.json:
             import json
             print(json.dumps(result, indent=2, ensure_ascii=False))
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Search Daemon - keeps every domain/stack index warm in one
+process and answers queries over localhost HTTP.
+
+Usage:
+    python search.py --serve [--host 127.0.0.1] [--port 8765]
+
+Protocol:
+    POST /  {"op": "search", "args": {"query": "...", "domain": "style"}}
+    ->      {"result": {...}, "engine": {...}}  or  {"error": "..."}
+    GET /health -> {"status": "ok", "pid": ..., "engine": {...}}
+
+"engine" is core.engine_signature(): the daemon's data dir, index version
+and tokenizer. Clients use client.query_daemon(), which returns None when
+no daemon is listening, or when one answers for a different engine, so
+callers can fall back to in-process search.
+"""
+
+import json
+import os
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from client import DEFAULT_HOST, DEFAULT_PORT
+from core import MAX_RESULTS, engine_signature, request_error, search, search_many, search_stack, warm_indexes
+
+
+def _design_system(args):
+    from design_system import generate_design_system
+    return generate_design_system(args["query"], args.get("project_name"), args.get("format", "ascii"),
+                                  args.get("cache", True))
+
+
+OPS = {
+    "search": lambda args: search(args["query"], args.get("domain"), args.get("max_results", MAX_RESULTS),
+                                  args.get("fields"), args.get("cache", True), args.get("where")),
+    "search_stack": lambda args: search_stack(args["query"], args["stack"], args.get("max_results", MAX_RESULTS),
+                                              args.get("fields"), args.get("cache", True), args.get("where")),
+    "search_many": lambda args: search_many(args["queries"], args.get("cache", True)),
+    "design_system": _design_system
+}
+ENGINE = engine_signature()
+
+
+# ============ SERVER ============
+class SearchRequestHandler(BaseHTTPRequestHandler):
+    """JSON request handler dispatching to OPS"""
+
+    protocol_version = "HTTP/1.1"
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok", "pid": os.getpid(), "engine": ENGINE})
+        else:
+            self._send_json(404, {"error": f"Unknown path: {self.path}"})
+
+    def do_POST(self):
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            handler = OPS[request["op"]]
+            args = request.get("args", {})
+            if request["op"] == "search_many":
+                if not isinstance(args.get("queries"), list):
+                    raise ValueError("\"queries\" must be a list")
+            else:
+                error = request_error(args)
+                if error:
+                    raise ValueError(error)
+            result = handler(args)
+        except KeyError as e:
+            self._send_json(400, {"error": f"Missing or unknown field: {e}"})
+        except (ValueError, TypeError, AttributeError) as e:
+            self._send_json(400, {"error": f"Bad request: {e}"})
+        else:
+            self._send_json(200, {"result": result, "engine": ENGINE})
+
+    def log_message(self, format, *args):
+        """Silence per-request logging"""
+
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """Warm all indexes, then serve queries until interrupted"""
+    warm_indexes()
+    httpd = ThreadingHTTPServer((host, port), SearchRequestHandler)
+    httpd.daemon_threads = True
+    print(f"UI Pro Max search daemon listening on http://{host}:{port}", file=sys.stderr)
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+
@@ -14,12 +14,14 @@ This script verifies:
 """
 import subprocess
 import json
+import io
 import os
 import sys
 import re
 import argparse
+from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 from datetime import datetime
 
 # Fix Windows console encoding for Unicode output
@@ -58,6 +60,28 @@ SECRET_PATTERNS = [
     (r'eyJ[A-Za-z0-9-_]+\.eyJ[A-Za-z0-9-_]+\.[A-Za-z0-9-_]+', "JWT Token", "high"),
 ]
 
+# Literal text (lowercase) that every match of a secret type contains, one of
+# the alternatives given. A file containing none of them is not searched for
+# that type: a substring check is far cheaper than a regex pass. Types without
+# an entry are always searched.
+SECRET_ANCHORS = {
+    "API Key": ("api_key", "api-key", "apikey"),
+    "Token": ("token",),
+    "Bearer Token": ("bearer",),
+    "AWS Access Key": ("akia",),
+    "AWS Secret": ("aws",),
+    "Azure Credential": ("azure",),
+    "GCP Credential": ("google",),
+    "Password": ("password",),
+    "Database Connection String": ("mongodb://", "postgres://", "mysql://", "redis://"),
+    "Private Key": ("-----begin",),
+    "SSH Key": ("ssh-rsa",),
+    "JWT Token": ("eyj",),
+}
+
+# Non-ASCII characters that re.IGNORECASE matches to ASCII letters
+CASE_FOLD = str.maketrans({"\u0130": "i", "\u0131": "i", "\u017f": "s", "\u212a": "k"})
+
 DANGEROUS_PATTERNS = [
     # Injection risks
     (r'eval\s*\(', "eval() usage", "critical", "Code Injection risk"),
@@ -88,6 +112,16 @@ DANGEROUS_PATTERNS = [
 SKIP_DIRS = {'node_modules', '.git', 'dist', 'build', '__pycache__', '.venv', 'venv', '.next'}
 CODE_EXTENSIONS = {'.js', '.ts', '.jsx', '.tsx', '.py', '.go', '.java', '.rb', '.php'}
 CONFIG_EXTENSIONS = {'.json', '.yaml', '.yml', '.toml', '.env', '.env.local', '.env.development'}
+CONFIG_FILES = {'next.config.js', 'webpack.config.js', '.eslintrc.js'}
+
+CONFIG_ISSUES = [
+    (r'"DEBUG"\s*:\s*true', "Debug mode enabled", "high"),
+    (r'debug\s*=\s*True', "Debug mode enabled", "high"),
+    (r'NODE_ENV.*development', "Development mode in config", "medium"),
+    (r'"CORS_ALLOW_ALL".*true', "CORS allow all origins", "high"),
+    (r'"Access-Control-Allow-Origin".*\*', "CORS wildcard", "high"),
+    (r'allowCredentials.*true.*origin.*\*', "Dangerous CORS combo", "critical"),
+]
 
 
 # ============================================================================
@@ -178,191 +212,276 @@ def scan_dependencies(project_path: str) -> Dict[str, Any]:
     return results
 
 
-def scan_secrets(project_path: str) -> Dict[str, Any]:
-    """
-    Validate no hardcoded secrets (OWASP A04).
-    Checks: API keys, tokens, passwords, cloud credentials.
-    """
-    results = {
-        "tool": "secret_scanner",
-        "findings": [],
-        "status": "[OK] No secrets detected",
-        "scanned_files": 0,
-        "by_severity": {"critical": 0, "high": 0, "medium": 0}
-    }
-    
+# ============================================================================
+#  FILE WALK
+# ============================================================================
+
+def iter_project_files(project_path: str):
+    """Yield (path, lowercase extension) for every file outside SKIP_DIRS."""
     for root, dirs, files in os.walk(project_path):
         dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
         
         for file in files:
-            ext = Path(file).suffix.lower()
-            if ext not in CODE_EXTENSIONS and ext not in CONFIG_EXTENSIONS:
-                continue
-                
-            filepath = Path(root) / file
-            results["scanned_files"] += 1
-            
-            try:
-                with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read()
-                    
-                    for pattern, secret_type, severity in SECRET_PATTERNS:
-                        matches = re.findall(pattern, content, re.IGNORECASE)
-                        if matches:
-                            results["findings"].append({
-                                "file": str(filepath.relative_to(project_path)),
-                                "type": secret_type,
-                                "severity": severity,
-                                "count": len(matches)
-                            })
-                            results["by_severity"][severity] += len(matches)
-                            
-            except Exception:
-                pass
+            yield Path(root) / file, Path(file).suffix.lower()
+
+
+def read_source(filepath: Path) -> str:
+    """
+    Read a file as UTF-8 text, ignoring undecodable bytes.
+    Same text as open(filepath, encoding='utf-8', errors='ignore').read(),
+    decoded in one call instead of through the incremental text reader.
+    """
+    with open(filepath, 'rb') as f:
+        content = f.read().decode('utf-8', errors='ignore')
+    if '\r' in content:
+        content = content.replace('\r\n', '\n').replace('\r', '\n')
+    return content
+
+
+class FileScanner(ABC):
+    """
+    A scanner that checks file contents. scan_project_files() walks the
+    project once for any number of them and reads each file only once.
+    """
     
-    if results["by_severity"]["critical"] > 0:
-        results["status"] = "[!!] CRITICAL: Secrets exposed!"
-    elif results["by_severity"]["high"] > 0:
-        results["status"] = "[!] HIGH: Secrets found"
-    elif sum(results["by_severity"].values()) > 0:
-        results["status"] = "[?] Potential secrets detected"
+    def __init__(self, project_path: str):
+        self.project_path = project_path
+        self.results: Dict[str, Any] = {}
     
-    # Limit findings for output
-    results["findings"] = results["findings"][:15]
+    @abstractmethod
+    def covers(self, name: str, ext: str) -> bool:
+        """Whether a file with this name and extension is scanned."""
     
-    return results
+    @abstractmethod
+    def scan_file(self, relpath: str, content: Optional[str]) -> None:
+        """Check one file; content is None if it could not be read."""
+    
+    def finish(self) -> Dict[str, Any]:
+        """Set the status once every file was seen and return the results."""
+        return self.results
 
 
-def scan_code_patterns(project_path: str) -> Dict[str, Any]:
+def scan_project_files(project_path: str, scanners: List[FileScanner]) -> List[Dict[str, Any]]:
     """
-    Validate dangerous code patterns (OWASP A05).
-    Checks: Injection risks, XSS, unsafe deserialization.
+    Walk the project once, hand every file to the scanners covering it and
+    return their results in order.
     """
-    results = {
-        "tool": "pattern_scanner",
-        "findings": [],
-        "status": "[OK] No dangerous patterns",
-        "scanned_files": 0,
-        "by_category": {}
-    }
-    
-    for root, dirs, files in os.walk(project_path):
-        dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
+    for filepath, ext in iter_project_files(project_path):
+        interested = [s for s in scanners if s.covers(filepath.name, ext)]
+        if not interested:
+            continue
         
-        for file in files:
-            ext = Path(file).suffix.lower()
-            if ext not in CODE_EXTENSIONS:
-                continue
-                
-            filepath = Path(root) / file
-            results["scanned_files"] += 1
-            
+        relpath = str(filepath.relative_to(project_path))
+        try:
+            content = read_source(filepath)
+        except Exception:
+            content = None
+        
+        for scanner in interested:
             try:
-                with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-                    lines = f.readlines()
-                    
-                    for line_num, line in enumerate(lines, 1):
-                        for pattern, name, severity, category in DANGEROUS_PATTERNS:
-                            if re.search(pattern, line, re.IGNORECASE):
-                                results["findings"].append({
-                                    "file": str(filepath.relative_to(project_path)),
-                                    "line": line_num,
-                                    "pattern": name,
-                                    "severity": severity,
-                                    "category": category,
-                                    "snippet": line.strip()[:80]
-                                })
-                                results["by_category"][category] = results["by_category"].get(category, 0) + 1
-                                
+                scanner.scan_file(relpath, content)
             except Exception:
                 pass
     
-    critical_count = sum(1 for f in results["findings"] if f["severity"] == "critical")
-    high_count = sum(1 for f in results["findings"] if f["severity"] == "high")
+    return [scanner.finish() for scanner in scanners]
+
+
+class SecretScanner(FileScanner):
+    """
+    Validate no hardcoded secrets (OWASP A04).
+    Checks: API keys, tokens, passwords, cloud credentials.
+    """
     
-    if critical_count > 0:
-        results["status"] = f"[!!] CRITICAL: {critical_count} dangerous patterns"
-    elif high_count > 0:
-        results["status"] = f"[!] HIGH: {high_count} risky patterns"
-    elif results["findings"]:
-        results["status"] = "[?] Some patterns need review"
+    def __init__(self, project_path: str):
+        super().__init__(project_path)
+        self.results = {
+            "tool": "secret_scanner",
+            "findings": [],
+            "status": "[OK] No secrets detected",
+            "scanned_files": 0,
+            "by_severity": {"critical": 0, "high": 0, "medium": 0}
+        }
+        self.regexes = [
+            (re.compile(pattern, re.IGNORECASE), secret_type, severity, SECRET_ANCHORS.get(secret_type))
+            for pattern, secret_type, severity in SECRET_PATTERNS
+        ]
+    
+    def covers(self, name: str, ext: str) -> bool:
+        return ext in CODE_EXTENSIONS or ext in CONFIG_EXTENSIONS
+    
+    def scan_file(self, relpath: str, content: Optional[str]) -> None:
+        results = self.results
+        results["scanned_files"] += 1
+        if content is None:
+            return
+        
+        # Lowercased once per file for the anchor checks
+        folded = (content if content.isascii() else content.translate(CASE_FOLD)).lower()
+        
+        for regex, secret_type, severity, anchors in self.regexes:
+            if anchors and not any(anchor in folded for anchor in anchors):
+                continue
+            matches = regex.findall(content)
+            if matches:
+                results["findings"].append({
+                    "file": relpath,
+                    "type": secret_type,
+                    "severity": severity,
+                    "count": len(matches)
+                })
+                results["by_severity"][severity] += len(matches)
+    
+    def finish(self) -> Dict[str, Any]:
+        results = self.results
+        if results["by_severity"]["critical"] > 0:
+            results["status"] = "[!!] CRITICAL: Secrets exposed!"
+        elif results["by_severity"]["high"] > 0:
+            results["status"] = "[!] HIGH: Secrets found"
+        elif sum(results["by_severity"].values()) > 0:
+            results["status"] = "[?] Potential secrets detected"
+        
+        # Limit findings for output
+        results["findings"] = results["findings"][:15]
+        
+        return results
+
+
+class CodePatternScanner(FileScanner):
+    """
+    Validate dangerous code patterns (OWASP A05).
+    Checks: Injection risks, XSS, unsafe deserialization.
+    """
     
-    # Limit findings
-    results["findings"] = results["findings"][:20]
+    def __init__(self, project_path: str):
+        super().__init__(project_path)
+        self.results = {
+            "tool": "pattern_scanner",
+            "findings": [],
+            "status": "[OK] No dangerous patterns",
+            "scanned_files": 0,
+            "by_category": {}
+        }
+        self.regexes = [
+            (re.compile(pattern, re.IGNORECASE), name, severity, category)
+            for pattern, name, severity, category in DANGEROUS_PATTERNS
+        ]
+    
+    def covers(self, name: str, ext: str) -> bool:
+        return ext in CODE_EXTENSIONS
+    
+    def scan_file(self, relpath: str, content: Optional[str]) -> None:
+        results = self.results
+        results["scanned_files"] += 1
+        if content is None:
+            return
+        
+        for line_num, line in enumerate(io.StringIO(content), 1):
+            for regex, name, severity, category in self.regexes:
+                if regex.search(line):
+                    results["findings"].append({
+                        "file": relpath,
+                        "line": line_num,
+                        "pattern": name,
+                        "severity": severity,
+                        "category": category,
+                        "snippet": line.strip()[:80]
+                    })
+                    results["by_category"][category] = results["by_category"].get(category, 0) + 1
     
-    return results
+    def finish(self) -> Dict[str, Any]:
+        results = self.results
+        critical_count = sum(1 for f in results["findings"] if f["severity"] == "critical")
+        high_count = sum(1 for f in results["findings"] if f["severity"] == "high")
+        
+        if critical_count > 0:
+            results["status"] = f"[!!] CRITICAL: {critical_count} dangerous patterns"
+        elif high_count > 0:
+            results["status"] = f"[!] HIGH: {high_count} risky patterns"
+        elif results["findings"]:
+            results["status"] = "[?] Some patterns need review"
+        
+        # Limit findings
+        results["findings"] = results["findings"][:20]
+        
+        return results
 
 
-def scan_configuration(project_path: str) -> Dict[str, Any]:
+class ConfigScanner(FileScanner):
     """
     Validate security configuration (OWASP A02).
     Checks: Security headers, CORS, debug modes.
     """
-    results = {
-        "tool": "config_scanner",
-        "findings": [],
-        "status": "[OK] Configuration secure",
-        "checks": {}
-    }
     
-    # Check common config files for issues
-    config_issues = [
-        (r'"DEBUG"\s*:\s*true', "Debug mode enabled", "high"),
-        (r'debug\s*=\s*True', "Debug mode enabled", "high"),
-        (r'NODE_ENV.*development', "Development mode in config", "medium"),
-        (r'"CORS_ALLOW_ALL".*true', "CORS allow all origins", "high"),
-        (r'"Access-Control-Allow-Origin".*\*', "CORS wildcard", "high"),
-        (r'allowCredentials.*true.*origin.*\*', "Dangerous CORS combo", "critical"),
-    ]
+    def __init__(self, project_path: str):
+        super().__init__(project_path)
+        self.results = {
+            "tool": "config_scanner",
+            "findings": [],
+            "status": "[OK] Configuration secure",
+            "checks": {}
+        }
+        self.regexes = [
+            (re.compile(pattern, re.IGNORECASE), issue, severity)
+            for pattern, issue, severity in CONFIG_ISSUES
+        ]
     
-    for root, dirs, files in os.walk(project_path):
-        dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
-        
-        for file in files:
-            ext = Path(file).suffix.lower()
-            if ext not in CONFIG_EXTENSIONS and file not in ['next.config.js', 'webpack.config.js', '.eslintrc.js']:
-                continue
-                
-            filepath = Path(root) / file
-            
-            try:
-                with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read()
-                    
-                    for pattern, issue, severity in config_issues:
-                        if re.search(pattern, content, re.IGNORECASE):
-                            results["findings"].append({
-                                "file": str(filepath.relative_to(project_path)),
-                                "issue": issue,
-                                "severity": severity
-                            })
-                            
-            except Exception:
-                pass
+    def covers(self, name: str, ext: str) -> bool:
+        return ext in CONFIG_EXTENSIONS or name in CONFIG_FILES
     
-    # Check for security header configurations
-    header_files = ["next.config.js", "next.config.mjs", "middleware.ts", "nginx.conf"]
-    for hf in header_files:
-        hf_path = Path(project_path) / hf
-        if hf_path.exists():
-            results["checks"]["security_headers_config"] = True
-            break
-    else:
-        results["checks"]["security_headers_config"] = False
-        results["findings"].append({
-            "issue": "No security headers configuration found",
-            "severity": "medium",
-            "recommendation": "Configure CSP, HSTS, X-Frame-Options headers"
-        })
-    
-    if any(f["severity"] == "critical" for f in results["findings"]):
-        results["status"] = "[!!] CRITICAL: Configuration issues"
-    elif any(f["severity"] == "high" for f in results["findings"]):
-        results["status"] = "[!] HIGH: Configuration review needed"
-    elif results["findings"]:
-        results["status"] = "[?] Minor configuration issues"
+    def scan_file(self, relpath: str, content: Optional[str]) -> None:
+        if content is None:
+            return
+        
+        for regex, issue, severity in self.regexes:
+            if regex.search(content):
+                self.results["findings"].append({
+                    "file": relpath,
+                    "issue": issue,
+                    "severity": severity
+                })
     
-    return results
+    def finish(self) -> Dict[str, Any]:
+        results = self.results
+        project_path = self.project_path
+        
+        # Check for security header configurations
+        header_files = ["next.config.js", "next.config.mjs", "middleware.ts", "nginx.conf"]
+        for hf in header_files:
+            hf_path = Path(project_path) / hf
+            if hf_path.exists():
+                results["checks"]["security_headers_config"] = True
+                break
+        else:
+            results["checks"]["security_headers_config"] = False
+            results["findings"].append({
+                "issue": "No security headers configuration found",
+                "severity": "medium",
+                "recommendation": "Configure CSP, HSTS, X-Frame-Options headers"
+            })
+        
+        if any(f["severity"] == "critical" for f in results["findings"]):
+            results["status"] = "[!!] CRITICAL: Configuration issues"
+        elif any(f["severity"] == "high" for f in results["findings"]):
+            results["status"] = "[!] HIGH: Configuration review needed"
+        elif results["findings"]:
+            results["status"] = "[?] Minor configuration issues"
+        
+        return results
+
+
+def scan_secrets(project_path: str) -> Dict[str, Any]:
+    """Run the SecretScanner on its own."""
+    return scan_project_files(project_path, [SecretScanner(project_path)])[0]
+
+
+def scan_code_patterns(project_path: str) -> Dict[str, Any]:
+    """Run the CodePatternScanner on its own."""
+    return scan_project_files(project_path, [CodePatternScanner(project_path)])[0]
+
+
+def scan_configuration(project_path: str) -> Dict[str, Any]:
+    """Run the ConfigScanner on its own."""
+    return scan_project_files(project_path, [ConfigScanner(project_path)])[0]
 
 
 # ============================================================================
@@ -387,25 +506,31 @@ def run_full_scan(project_path: str, scan_type: str = "all") -> Dict[str, Any]:
     
     scanners = {
         "deps": ("dependencies", scan_dependencies),
-        "secrets": ("secrets", scan_secrets),
-        "patterns": ("code_patterns", scan_code_patterns),
-        "config": ("configuration", scan_configuration),
+        "secrets": ("secrets", SecretScanner),
+        "patterns": ("code_patterns", CodePatternScanner),
+        "config": ("configuration", ConfigScanner),
     }
+    selected = [(name, scanner) for key, (name, scanner) in scanners.items()
+                if scan_type == "all" or scan_type == key]
     
-    for key, (name, scanner) in scanners.items():
-        if scan_type == "all" or scan_type == key:
-            result = scanner(project_path)
-            report["scans"][name] = result
-            
-            findings_count = len(result.get("findings", []))
-            report["summary"]["total_findings"] += findings_count
-            
-            for finding in result.get("findings", []):
-                sev = finding.get("severity", "low")
-                if sev == "critical":
-                    report["summary"]["critical"] += 1
-                elif sev == "high":
-                    report["summary"]["high"] += 1
+    # File scanners share one walk and one read per file
+    file_scanners = {name: scanner(project_path) for name, scanner in selected
+                     if isinstance(scanner, type) and issubclass(scanner, FileScanner)}
+    file_results = dict(zip(file_scanners, scan_project_files(project_path, list(file_scanners.values()))))
+    
+    for name, scanner in selected:
+        result = file_results[name] if name in file_results else scanner(project_path)
+        report["scans"][name] = result
+        
+        findings_count = len(result.get("findings", []))
+        report["summary"]["total_findings"] += findings_count
+        
+        for finding in result.get("findings", []):
+            sev = finding.get("severity", "low")
+            if sev == "critical":
+                report["summary"]["critical"] += 1
+            elif sev == "high":
+                report["summary"]["high"] += 1
     
     # Determine overall status
     if report["summary"]["critical"] > 0: